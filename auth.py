@@ -1,52 +1,103 @@
 from datetime import datetime, timedelta
-from typing import Optional
-from jose import JWTError, jwt
-from passlib.context import CryptContext
+from typing import Optional, Tuple
+from functools import lru_cache
+import uuid
+from jose import JWTError
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 import os
-from dotenv import load_dotenv
 
 from database import get_db
 from models import User, UserRole
 from schemas import TokenData
-
-load_dotenv()
+from utils.revocation import revocation_list, to_micros
 
 SECRET_KEY = os.getenv("SECRET_KEY", "your-insecure-default-key-REPLACE-THIS-NOW")
 ALGORITHM = "HS256"
 
 try:
-    ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", 1440))
+    ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", 15))
+except (TypeError, ValueError):
+    ACCESS_TOKEN_EXPIRE_MINUTES = 15
+
+try:
+    REFRESH_TOKEN_EXPIRE_DAYS = int(os.getenv("REFRESH_TOKEN_EXPIRE_DAYS", 14))
+except (TypeError, ValueError):
+    REFRESH_TOKEN_EXPIRE_DAYS = 14
+
+try:
+    BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", 12))
 except (TypeError, ValueError):
-    ACCESS_TOKEN_EXPIRE_MINUTES = 1440
+    BCRYPT_ROUNDS = 12
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated=["auto"])
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
 
+# passlib and jose.jwt are only imported on first use so worker boot does not
+# pay for them; they are needed by the first login or authenticated request.
+@lru_cache(maxsize=None)
+def get_pwd_context():
+    from passlib.context import CryptContext
+    
+    return CryptContext(schemes=["bcrypt"], deprecated=["auto"], bcrypt__rounds=BCRYPT_ROUNDS)
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+    return get_pwd_context().verify(plain_password, hashed_password)
 
 def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
+    return get_pwd_context().hash(password)
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
+    from jose import jwt
+    
     to_encode = data.copy()
     
     if 'sub' in to_encode and not isinstance(to_encode['sub'], str):
         to_encode['sub'] = str(to_encode['sub'])
     
+    now = datetime.utcnow()
     if expires_delta:
-        expire = datetime.utcnow() + expires_delta
+        expire = now + expires_delta
     else:
-        expire = datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+        expire = now + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     
-    to_encode.update({"exp": expire})
+    to_encode.setdefault("type", "access")
+    to_encode.setdefault("jti", uuid.uuid4().hex)
+    to_encode.update({"exp": expire, "iat": now, "iat_us": to_micros(now)})
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
+def create_refresh_token(user_id: int, family_id: Optional[str] = None) -> Tuple[str, str, str, datetime]:
+    jti = uuid.uuid4().hex
+    family_id = family_id or uuid.uuid4().hex
+    expire = datetime.utcnow() + timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS)
+    
+    token = create_access_token(
+        data={"sub": user_id, "type": "refresh", "jti": jti, "fam": family_id},
+        expires_delta=timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS)
+    )
+    return token, jti, family_id, expire
+
+def issued_at_micros(payload: dict) -> Optional[int]:
+    if "iat_us" in payload:
+        return int(payload["iat_us"])
+    if "iat" in payload:
+        # Older tokens only carry whole seconds; assume the end of that second
+        return int(payload["iat"]) * 1_000_000 + 999_999
+    return None
+
+def decode_token(token: str, expected_type: str = "access") -> dict:
+    from jose import jwt
+    
+    payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    
+    # Tokens issued before refresh support carry no type and are access tokens
+    if payload.get("type", "access") != expected_type:
+        raise JWTError("Unexpected token type")
+    
+    return payload
+
 async def get_current_user(
     token: str = Depends(oauth2_scheme),
     db: AsyncSession = Depends(get_db)
@@ -58,7 +109,7 @@ async def get_current_user(
     )
     
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        payload = decode_token(token)
         
         user_id_str: str = payload.get("sub")
         username: str = payload.get("username")
@@ -74,6 +125,9 @@ async def get_current_user(
     except (JWTError, ValueError):
         raise credentials_exception
     
+    if revocation_list.is_revoked(payload.get("jti"), token_data.user_id, issued_at_micros(payload)):
+        raise credentials_exception
+    
     result = await db.execute(select(User).where(User.id == token_data.user_id))
     user = result.scalar_one_or_none()
     
@@ -0,0 +1,48 @@
+import argparse
+import os
+import sys
+
+from benchmarks import runner
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="Microbenchmarks for per-request hot paths")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="Time every case and save the results as JSON")
+    run_parser.add_argument("-o", "--output", default=DEFAULT_BASELINE)
+    run_parser.add_argument("-k", "--filter", action="append", help="Only run cases whose name contains this text")
+    run_parser.add_argument("--repeats", type=int, default=5)
+    run_parser.add_argument("--min-time", type=float, default=0.2, help="Minimum seconds per repeat")
+    run_parser.add_argument("--compare", metavar="BASELINE", help="Compare against a baseline after running")
+    run_parser.add_argument("--threshold", type=float, default=0.10)
+
+    compare_parser = commands.add_parser("compare", help="Flag cases that slowed down beyond the threshold")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("current")
+    compare_parser.add_argument("--threshold", type=float, default=0.10, help="Allowed slowdown, 0.10 = 10%%")
+
+    args = parser.parse_args(argv)
+
+    if args.command == "run":
+        from benchmarks.cases import CASES
+
+        results = runner.run(CASES, args.filter, args.repeats, args.min_time)
+        runner.save(results, args.output)
+        print(f"\nSaved {len(results['results'])} results to {args.output}")
+        if not args.compare:
+            return 0
+        baseline, current = runner.load(args.compare), results
+    else:
+        baseline, current = runner.load(args.baseline), runner.load(args.current)
+
+    lines, regressions = runner.compare(baseline, current, args.threshold)
+    print("\n".join(lines))
+    if regressions:
+        print(f"\n{len(regressions)} case(s) slower than baseline by more than {args.threshold:.0%}")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,90 @@
+import json
+import platform
+import statistics
+import time
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+def calibrate(func, min_time: float) -> int:
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time or number >= 1_000_000:
+            return number
+        number = max(number * 2, int(number * min_time / max(elapsed, 1e-9)))
+
+def time_case(func, repeats: int, min_time: float) -> dict:
+    number = calibrate(func, min_time)
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        timings.append((time.perf_counter() - start) / number)
+
+    return {
+        "median": statistics.median(timings),
+        "min": min(timings),
+        "max": max(timings),
+        "number": number,
+        "repeats": repeats
+    }
+
+def run(cases: Dict, selected: Optional[Iterable[str]] = None, repeats: int = 5, min_time: float = 0.2) -> dict:
+    from auth import BCRYPT_ROUNDS
+
+    results = {}
+    for name, factory in cases.items():
+        if selected and not any(pattern in name for pattern in selected):
+            continue
+        results[name] = time_case(factory(), repeats, min_time)
+        print(f"{name:<50} {format_seconds(results[name]['median']):>12}")
+
+    return {
+        "meta": {
+            "created_at": datetime.utcnow().isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "bcrypt_rounds": BCRYPT_ROUNDS
+        },
+        "results": results
+    }
+
+def compare(baseline: dict, current: dict, threshold: float) -> Tuple[List[str], List[str]]:
+    lines = []
+    regressions = []
+    for name, result in current["results"].items():
+        previous = baseline["results"].get(name)
+        if previous is None:
+            lines.append(f"{name:<50} {format_seconds(result['median']):>12}  (new)")
+            continue
+
+        change = result["median"] / previous["median"] - 1
+        flag = ""
+        if change > threshold:
+            flag = "  SLOWER"
+            regressions.append(name)
+        elif change < -threshold:
+            flag = "  faster"
+        lines.append(
+            f"{name:<50} {format_seconds(previous['median']):>12} -> "
+            f"{format_seconds(result['median']):>12} {change:+8.1%}{flag}"
+        )
+    return lines, regressions
+
+def format_seconds(seconds: float) -> str:
+    for unit, scale in (("s", 1), ("ms", 1e-3), ("us", 1e-6)):
+        if seconds >= scale:
+            return f"{seconds / scale:.3f} {unit}"
+    return f"{seconds / 1e-9:.1f} ns"
+
+def load(path: str) -> dict:
+    with open(path) as handle:
+        return json.load(handle)
+
+def save(results: dict, path: str):
+    with open(path, "w") as handle:
+        json.dump(results, handle, indent=2)
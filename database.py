@@ -1,11 +1,17 @@
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, AsyncConnection, async_sessionmaker
 from sqlalchemy.orm import declarative_base
-from typing import AsyncGenerator
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy import select, func, inspect, text
+from typing import AsyncGenerator, Optional
+import asyncio
 import os
 from dotenv import load_dotenv
-from typing import AsyncGenerator
 
-load_dotenv()
+from utils.slow_query import SlowQueryLog
+from utils.startup import startup_timer
+
+with startup_timer.phase("settings"):
+    load_dotenv()
 
 DATABASE_URL = os.getenv("DATABASE_URL")
 
@@ -14,12 +20,36 @@ if not DATABASE_URL:
         "DATABASE_URL environment variable is not set."
     )
 
+# check: run the steps in migrations.py newer than the stored schema version;
+# create: re-run every step; skip: assume the schema is managed elsewhere
+DB_INIT_MODE = os.getenv("DB_INIT_MODE", "check").lower()
+
+SQL_ECHO = os.getenv("SQL_ECHO", "false").lower() in ("1", "true", "yes")
+SLOW_QUERY_EXPLAIN = os.getenv("SLOW_QUERY_EXPLAIN", "false").lower() in ("1", "true", "yes")
+
+try:
+    SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", 200))
+except (TypeError, ValueError):
+    SLOW_QUERY_MS = 200.0
+
+try:
+    SLOW_QUERY_LOG_SIZE = int(os.getenv("SLOW_QUERY_LOG_SIZE", 500))
+except (TypeError, ValueError):
+    SLOW_QUERY_LOG_SIZE = 500
+
 engine = create_async_engine(
     DATABASE_URL,
-    echo=True,
+    echo=SQL_ECHO,
     future=True
 )
 
+slow_query_log = SlowQueryLog(
+    threshold_ms=SLOW_QUERY_MS,
+    size=SLOW_QUERY_LOG_SIZE,
+    explain=SLOW_QUERY_EXPLAIN
+)
+slow_query_log.install(engine)
+
 async_session_maker = async_sessionmaker(
     engine,
     class_=AsyncSession,
@@ -35,6 +65,55 @@ async def get_db() -> AsyncGenerator[AsyncSession, None]:
         finally:
             await session.close()
 
-async def init_db():
-    async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
\ No newline at end of file
+MIGRATION_ATTEMPTS = 3
+
+# Any constant shared by every worker; pg_advisory_xact_lock takes a bigint
+SCHEMA_LOCK_KEY = 0x5C4E3A
+
+def _read_schema_version(conn) -> Optional[int]:
+    from models import SchemaVersion
+    
+    # Checked rather than caught: on PostgreSQL a failed SELECT would abort
+    # the transaction and release the advisory lock held in it
+    if not inspect(conn).has_table(SchemaVersion.__tablename__):
+        return None
+    return conn.execute(select(func.max(SchemaVersion.version))).scalar()
+
+async def read_schema_version(conn: AsyncConnection) -> Optional[int]:
+    return await conn.run_sync(_read_schema_version)
+
+async def init_db() -> str:
+    from migrations import migrate, SCHEMA_VERSION
+    
+    if DB_INIT_MODE == "skip":
+        return "skipped"
+    
+    def is_current(version: Optional[int]) -> bool:
+        return DB_INIT_MODE == "check" and version is not None and version >= SCHEMA_VERSION
+    
+    async with engine.connect() as conn:
+        for attempt in range(MIGRATION_ATTEMPTS):
+            if is_current(await read_schema_version(conn)):
+                await conn.commit()
+                return "current"
+            
+            if conn.dialect.name == "postgresql":
+                # Workers booting together migrate one at a time; the others
+                # wait here and then see the version the first one stamped
+                await conn.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": SCHEMA_LOCK_KEY})
+            stored_version = await read_schema_version(conn)
+            if is_current(stored_version):
+                await conn.commit()
+                return "current"
+            
+            try:
+                applied = await conn.run_sync(migrate, stored_version, DB_INIT_MODE == "create")
+                await conn.commit()
+                return f"migrated to {SCHEMA_VERSION}" if applied else "current"
+            except DBAPIError:
+                # Dialects without an advisory lock can race another worker;
+                # the steps are idempotent, so look again and retry
+                await conn.rollback()
+                if attempt == MIGRATION_ATTEMPTS - 1:
+                    raise
+                await asyncio.sleep(0.5 * (attempt + 1))
@@ -1,14 +1,77 @@
-from fastapi import FastAPI
+from utils.startup import startup_timer
+
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 
-from database import init_db
-from routers import auth, classes, attendance
+from database import init_db, async_session_maker, DB_INIT_MODE
+from routers import auth, classes, attendance, dashboard, sync, admin
+from utils.class_index import class_code_index, CLASS_INDEX_SYNC_SECONDS
+from utils.revocation import revocation_list, REVOCATION_SYNC_SECONDS
+from utils.dashboard_cache import dashboard_cache
+from utils.slow_query import current_route
+from utils.scheduler import Scheduler, BACKGROUND_JOBS_ENABLED
+from utils.finalise import finalise_attendance, FINALISE_INTERVAL_SECONDS
+from utils.class_purge import resume_stalled_purges, PURGE_RESUME_AFTER_SECONDS
+
+startup_timer.mark_imported()
+
+async def sync_class_caches() -> dict:
+    result = await class_code_index.sync(async_session_maker)
+    # Dashboards cached here may still list a class deleted on another worker
+    if result["removed"]:
+        dashboard_cache.clear()
+    return result
+
+def build_scheduler() -> Scheduler:
+    scheduler = Scheduler(async_session_maker)
+    
+    # Every worker keeps its own in-memory revocation list and class index
+    scheduler.add_job(
+        "revocation_sync",
+        lambda: revocation_list.refresh(async_session_maker),
+        REVOCATION_SYNC_SECONDS,
+        exclusive=False
+    )
+    scheduler.add_job(
+        "class_index_sync",
+        sync_class_caches,
+        CLASS_INDEX_SYNC_SECONDS,
+        exclusive=False
+    )
+    
+    if BACKGROUND_JOBS_ENABLED:
+        scheduler.add_job(
+            "finalise_attendance",
+            lambda: finalise_attendance(async_session_maker),
+            FINALISE_INTERVAL_SECONDS
+        )
+        scheduler.add_job(
+            "resume_class_purges",
+            resume_stalled_purges,
+            PURGE_RESUME_AFTER_SECONDS
+        )
+    
+    return scheduler
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    await init_db()
+    with startup_timer.phase("db_connect"):
+        startup_timer.details["db_init_mode"] = DB_INIT_MODE
+        startup_timer.details["schema"] = await init_db()
+    
+    with startup_timer.phase("warmup"):
+        async with async_session_maker() as session:
+            await class_code_index.refresh(session)
+            await revocation_list.sync(session, full=True)
+        
+        app.state.scheduler = build_scheduler()
+        app.state.scheduler.start()
+    
+    startup_timer.mark_ready()
     yield
+    
+    await app.state.scheduler.stop()
 
 app = FastAPI(
     title="E-Attendance System API",
@@ -25,9 +88,20 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.middleware("http")
+async def track_route(request: Request, call_next):
+    token = current_route.set(f"{request.method} {request.url.path}")
+    try:
+        return await call_next(request)
+    finally:
+        current_route.reset(token)
+
 app.include_router(auth.router)
 app.include_router(classes.router)
 app.include_router(attendance.router)
+app.include_router(dashboard.router)
+app.include_router(sync.router)
+app.include_router(admin.router)
 
 @app.get("/")
 async def root():
@@ -0,0 +1,125 @@
+import logging
+from datetime import datetime
+from typing import Callable, List, Optional, Tuple
+
+from sqlalchemy import inspect, insert, false, text
+from sqlalchemy.engine import Connection
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.schema import CreateIndex
+
+from database import Base
+from models import Attendance, Class, ClassPurgeJob, SchemaVersion
+
+logger = logging.getLogger(__name__)
+
+# create_all only creates missing tables, so every column or index added to
+# an existing table needs a step here. Steps must be safe to re-run: they
+# check the live schema first, because a fresh database already gets the
+# current shape from create_all. Versions up to 38 were stamped by
+# create_all alone and may be missing anything added after the baseline.
+
+def column_names(conn: Connection, table) -> set:
+    return {column["name"] for column in inspect(conn).get_columns(table.name)}
+
+def add_column(conn: Connection, column, default=None):
+    table = column.table
+    if column.name in column_names(conn, table):
+        return
+
+    # IF NOT EXISTS where supported, in case the column appears between the
+    # check above and the ALTER
+    if_not_exists = "IF NOT EXISTS " if conn.dialect.name == "postgresql" else ""
+    preparer = conn.dialect.identifier_preparer
+    ddl = (
+        f"ALTER TABLE {preparer.format_table(table)} "
+        f"ADD COLUMN {if_not_exists}{preparer.format_column(column)} {column.type.compile(dialect=conn.dialect)}"
+    )
+    if default is not None:
+        ddl += f" DEFAULT {default.compile(dialect=conn.dialect)}"
+    if not column.nullable:
+        ddl += " NOT NULL"
+    conn.execute(text(ddl))
+
+def create_index(conn: Connection, table, name: str):
+    # IF NOT EXISTS rather than checkfirst: reflection skips expression
+    # indexes such as lower(code) on some dialects
+    index = next(index for index in table.indexes if index.name == name)
+    conn.execute(CreateIndex(index, if_not_exists=True))
+
+def add_series_columns_and_indexes(conn: Connection):
+    add_column(conn, Class.__table__.c.geofence)
+    add_column(conn, Class.__table__.c.require_session_code, default=false())
+    add_column(conn, Class.__table__.c.deleted_at)
+    add_column(conn, Attendance.__table__.c.updated_at)
+
+    for name in (
+        "ix_classes_lecturer_id",
+        "ix_classes_deleted_at",
+        "ix_classes_code_lower",
+        "ix_classes_name_lower",
+        "ix_classes_latitude_longitude",
+    ):
+        create_index(conn, Class.__table__, name)
+
+    for name in (
+        "ix_attendance_student_id",
+        "ix_attendance_class_id",
+        "ix_attendance_updated_at",
+        "ix_attendance_status_marked_at",
+    ):
+        create_index(conn, Attendance.__table__, name)
+
+def rebuild_pattern_indexes(conn: Connection):
+    # Earlier builds created the lower() indexes without text_pattern_ops,
+    # which PostgreSQL cannot use for LIKE 'abc%' under most collations
+    if conn.dialect.name != "postgresql":
+        return
+    for name in ("ix_classes_code_lower", "ix_classes_name_lower"):
+        conn.execute(text(f"DROP INDEX IF EXISTS {name}"))
+        create_index(conn, Class.__table__, name)
+
+def add_purge_attempts(conn: Connection):
+    add_column(conn, ClassPurgeJob.__table__.c.attempts, default=text("0"))
+
+def add_trigram_indexes(conn: Connection):
+    # match=contains searches run LIKE '%abc%' on lower(code) and lower(name),
+    # which only a trigram index can serve. Not declared on the model because
+    # create_all would build plain duplicates of the lower() indexes elsewhere.
+    if conn.dialect.name != "postgresql":
+        return
+    try:
+        # pg_trgm may be missing or need a superuser; search still works
+        # without it, as a sequential scan
+        with conn.begin_nested():
+            conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+    except DBAPIError as exc:
+        logger.warning("pg_trgm unavailable, contains search will scan classes: %s", exc.orig)
+        return
+    for column in ("code", "name"):
+        conn.execute(text(
+            f"CREATE INDEX IF NOT EXISTS ix_classes_{column}_trgm "
+            f"ON classes USING gin (lower({column}) gin_trgm_ops)"
+        ))
+
+MIGRATIONS: List[Tuple[int, Callable[[Connection], None]]] = [
+    (39, add_series_columns_and_indexes),
+    (40, rebuild_pattern_indexes),
+    (41, add_purge_attempts),
+    (42, add_trigram_indexes),
+]
+
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+def migrate(conn: Connection, stored_version: Optional[int], rerun: bool = False) -> List[int]:
+    Base.metadata.create_all(conn)
+
+    applied = []
+    for version, step in MIGRATIONS:
+        if not rerun and stored_version is not None and version <= stored_version:
+            continue
+        step(conn)
+        # Stamped only after the step ran, in the same transaction
+        if stored_version is None or version > stored_version:
+            conn.execute(insert(SchemaVersion).values(version=version, applied_at=datetime.utcnow()))
+        applied.append(version)
+    return applied
@@ -1,9 +1,15 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Enum as SQLEnum
+from sqlalchemy import Column, Integer, String, Float, Boolean, Date, DateTime, ForeignKey, Index, JSON, func, Enum as SQLEnum
 from sqlalchemy.orm import relationship
 from datetime import datetime
 import enum
 from database import Base
 
+class PurgeJobStatus(str, enum.Enum):
+    PENDING = "pending"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
 class UserRole(str, enum.Enum):
     STUDENT = "student"
     LECTURER = "lecturer"
@@ -38,23 +44,116 @@ class Class(Base):
     latitude = Column(Float, nullable=False)
     longitude = Column(Float, nullable=False)
     radius = Column(Float, nullable=False)  # in meters
-    lecturer_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    geofence = Column(JSON(none_as_null=True), nullable=True)  # GeoJSON Polygon/MultiPolygon, overrides radius
+    require_session_code = Column(Boolean, nullable=False, default=False)
+    lecturer_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
     created_at = Column(DateTime, default=datetime.utcnow)
+    deleted_at = Column(DateTime, nullable=True, index=True)  # set on delete; row removed by the purge job
     
     lecturer = relationship("User", back_populates="classes_taught", foreign_keys=[lecturer_id])
     attendance_records = relationship("Attendance", back_populates="class_")
+    
+    __table_args__ = (
+        # text_pattern_ops lets PostgreSQL use these for LIKE 'abc%' under
+        # any collation. "contains" searches (LIKE '%abc%') use the trigram
+        # indexes added in migrations.add_trigram_indexes
+        Index(
+            "ix_classes_code_lower",
+            func.lower(code).label("code_lower"),
+            postgresql_ops={"code_lower": "text_pattern_ops"}
+        ),
+        Index(
+            "ix_classes_name_lower",
+            func.lower(name).label("name_lower"),
+            postgresql_ops={"name_lower": "text_pattern_ops"}
+        ),
+        Index("ix_classes_latitude_longitude", latitude, longitude),
+    )
 
 class Attendance(Base):
     __tablename__ = "attendance"
     
     id = Column(Integer, primary_key=True, index=True)
-    student_id = Column(Integer, ForeignKey("users.id"), nullable=False)
-    class_id = Column(Integer, ForeignKey("classes.id"), nullable=False)
+    student_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    class_id = Column(Integer, ForeignKey("classes.id"), nullable=False, index=True)
     latitude = Column(Float, nullable=False)
     longitude = Column(Float, nullable=False)
     distance = Column(Float, nullable=False)
     status = Column(SQLEnum(AttendanceStatus), nullable=False, default=AttendanceStatus.PENDING)
     marked_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, nullable=True, index=True)  # set when the status changes after marking
     
     student = relationship("User", back_populates="attendance_records")
-    class_ = relationship("Class", back_populates="attendance_records")
\ No newline at end of file
+    class_ = relationship("Class", back_populates="attendance_records")
+    
+    __table_args__ = (
+        Index("ix_attendance_status_marked_at", status, marked_at),
+    )
+class RefreshToken(Base):
+    __tablename__ = "refresh_tokens"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    jti = Column(String, unique=True, index=True, nullable=False)
+    family_id = Column(String, index=True, nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    expires_at = Column(DateTime, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    revoked_at = Column(DateTime, nullable=True)
+    replaced_by = Column(String, nullable=True)
+
+class RevokedToken(Base):
+    __tablename__ = "revoked_tokens"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    jti = Column(String, unique=True, index=True, nullable=True)  # NULL revokes every token issued to user_id before revoked_at
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    revoked_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    expires_at = Column(DateTime, nullable=True, index=True)
+
+class ClassTombstone(Base):
+    __tablename__ = "class_tombstones"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    class_id = Column(Integer, nullable=False, index=True)
+    code = Column(String, nullable=False)
+    deleted_at = Column(DateTime, default=datetime.utcnow)
+
+
+class ClassPurgeJob(Base):
+    __tablename__ = "class_purge_jobs"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    class_id = Column(Integer, nullable=False, index=True)
+    requested_by = Column(Integer, ForeignKey("users.id"), nullable=False)
+    status = Column(SQLEnum(PurgeJobStatus), nullable=False, default=PurgeJobStatus.PENDING, index=True)
+    total_rows = Column(Integer, nullable=False, default=0)
+    processed_rows = Column(Integer, nullable=False, default=0)
+    attempts = Column(Integer, nullable=False, default=0)
+    error = Column(String, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+
+class AttendanceDailySummary(Base):
+    __tablename__ = "attendance_daily_summaries"
+    
+    class_id = Column(Integer, primary_key=True)
+    day = Column(Date, primary_key=True)
+    approved = Column(Integer, nullable=False, default=0)
+    denied = Column(Integer, nullable=False, default=0)
+    pending = Column(Integer, nullable=False, default=0)
+    refreshed_at = Column(DateTime, default=datetime.utcnow)
+
+class SchedulerLock(Base):
+    __tablename__ = "scheduler_locks"
+    
+    name = Column(String, primary_key=True)
+    owner = Column(String, nullable=False)
+    expires_at = Column(DateTime, nullable=False)
+
+class SchemaVersion(Base):
+    # One row per applied step in migrations.py
+    __tablename__ = "schema_version"
+    
+    version = Column(Integer, primary_key=True)
+    applied_at = Column(DateTime, default=datetime.utcnow)
\ No newline at end of file
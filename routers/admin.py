@@ -0,0 +1,48 @@
+from fastapi import APIRouter, Depends, Request, Response, status
+from typing import List
+
+from database import slow_query_log
+from models import User
+from schemas import SlowQueryEntry, ScheduledJobMetrics, StartupReport
+from auth import get_current_admin
+from utils.startup import startup_timer
+
+router = APIRouter(prefix="/admin", tags=["Admin"])
+
+@router.get("/slow-queries", response_model=List[SlowQueryEntry])
+async def get_slow_queries(
+    current_user: User = Depends(get_current_admin)
+):
+    return slow_query_log.entries()
+
+@router.get("/slow-queries/export")
+async def export_slow_queries(
+    current_user: User = Depends(get_current_admin)
+):
+    return Response(
+        content=slow_query_log.to_jsonl(),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": "attachment; filename=slow-queries.jsonl"}
+    )
+
+@router.delete("/slow-queries", status_code=status.HTTP_204_NO_CONTENT)
+async def clear_slow_queries(
+    current_user: User = Depends(get_current_admin)
+):
+    slow_query_log.clear()
+    return None
+
+
+@router.get("/scheduler", response_model=List[ScheduledJobMetrics])
+async def get_scheduler_metrics(
+    request: Request,
+    current_user: User = Depends(get_current_admin)
+):
+    scheduler = getattr(request.app.state, "scheduler", None)
+    return scheduler.metrics() if scheduler else []
+
+@router.get("/startup", response_model=StartupReport)
+async def get_startup_report(
+    current_user: User = Depends(get_current_admin)
+):
+    return startup_timer.report()
\ No newline at end of file
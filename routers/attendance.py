@@ -1,6 +1,6 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import select, func
 from typing import List
 from datetime import datetime, timedelta
 
@@ -8,10 +8,32 @@ from database import get_db
 from models import Attendance, Class, User, AttendanceStatus
 from schemas import AttendanceCreate, AttendanceResponse, AttendanceWithDetails
 from auth import get_current_active_student, get_current_lecturer_or_admin, get_current_user
-from utils.geofence import is_within_geofence
+from utils.geofence import is_within_geofence, get_compiled_geofence
+from utils.http_cache import make_etag, etag_matches, not_modified, cache_headers
+from utils.encoding import encoded_response, representation, VARY_HEADER
+from utils.dashboard_cache import invalidate_lecturer
+from utils.session_codes import verify_code, replay_cache
 
 router = APIRouter(prefix="/attendance", tags=["Attendance"])
 
+DICTIONARY_FIELDS = ("student_id", "student_name", "class_id", "class_name", "class_code", "status")
+
+async def attendance_version(db: AsyncSession, request: Request, scope: str, *criteria):
+    result = await db.execute(
+        select(
+            func.count(Attendance.id),
+            func.max(Attendance.id),
+            func.max(Attendance.marked_at),
+            func.max(Attendance.updated_at)
+        )
+        .join(Class, (Attendance.class_id == Class.id) & Class.deleted_at.is_(None))
+        .where(*criteria)
+    )
+    count, max_id, last_marked, last_updated = result.one()
+    last_modified = max(filter(None, (last_marked, last_updated)), default=None)
+    etag = make_etag(scope, representation(request), count, max_id, last_marked, last_updated)
+    return etag, last_modified
+
 @router.post("/mark", response_model=AttendanceResponse, status_code=status.HTTP_201_CREATED)
 async def mark_attendance(
     attendance_data: AttendanceCreate,
@@ -19,7 +41,7 @@ async def mark_attendance(
     current_user: User = Depends(get_current_active_student)
 ):
     result = await db.execute(
-        select(Class).where(Class.id == attendance_data.class_id)
+        select(Class).where(Class.id == attendance_data.class_id, Class.deleted_at.is_(None))
     )
     class_ = result.scalar_one_or_none()
     
@@ -29,6 +51,26 @@ async def mark_attendance(
             detail="Class not found"
         )
     
+    if attendance_data.session_code is not None or class_.require_session_code:
+        if not attendance_data.session_code:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="This class requires a session code"
+            )
+        
+        step = verify_code(class_.id, attendance_data.session_code)
+        if step is None:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Invalid or expired session code"
+            )
+        
+        if not replay_cache.check_and_add((class_.id, current_user.id, step)):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="This session code has already been used"
+            )
+    
     today_start = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
     today_end = today_start + timedelta(days=1)
     
@@ -53,7 +95,8 @@ async def mark_attendance(
         attendance_data.longitude,
         class_.latitude,
         class_.longitude,
-        class_.radius
+        class_.radius,
+        polygon=get_compiled_geofence(class_.geofence)
     )
     
     attendance_status = AttendanceStatus.APPROVED if is_within else AttendanceStatus.DENIED
@@ -71,11 +114,14 @@ async def mark_attendance(
     await db.commit()
     await db.refresh(new_attendance)
     
+    invalidate_lecturer(class_.lecturer_id)
+    
     return new_attendance
 
 @router.get("/student/{student_id}", response_model=List[AttendanceWithDetails])
 async def get_student_attendance(
     student_id: int,
+    request: Request,
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_lecturer_or_admin)
 ):
@@ -90,42 +136,41 @@ async def get_student_attendance(
             detail="Student not found"
         )
     
+    etag, last_modified = await attendance_version(
+        db, request, f"student:{student_id}", Attendance.student_id == student_id
+    )
+    if etag_matches(request, etag):
+        return not_modified(etag, last_modified, vary=VARY_HEADER)
+    
     result = await db.execute(
         select(Attendance, User, Class)
         .join(User, Attendance.student_id == User.id)
-        .join(Class, Attendance.class_id == Class.id)
+        .join(Class, (Attendance.class_id == Class.id) & Class.deleted_at.is_(None))
         .where(Attendance.student_id == student_id)
         .order_by(Attendance.marked_at.desc())
     )
     
-    attendance_records = []
-    for attendance, user, class_ in result.all():
-        attendance_records.append(
-            AttendanceWithDetails(
-                id=attendance.id,
-                student_id=attendance.student_id,
-                class_id=attendance.class_id,
-                latitude=attendance.latitude,
-                longitude=attendance.longitude,
-                distance=attendance.distance,
-                status=attendance.status,
-                marked_at=attendance.marked_at,
-                student_name=user.full_name,
-                class_name=class_.name,
-                class_code=class_.code
-            )
-        )
+    attendance_records = [
+        AttendanceWithDetails.from_records(attendance, user, class_)
+        for attendance, user, class_ in result.all()
+    ]
     
-    return attendance_records
+    return await encoded_response(
+        request,
+        attendance_records,
+        dictionary_fields=DICTIONARY_FIELDS,
+        headers=cache_headers(etag, last_modified)
+    )
 
 @router.get("/class/{class_id}", response_model=List[AttendanceWithDetails])
 async def get_class_attendance(
     class_id: int,
+    request: Request,
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_lecturer_or_admin)
 ):
     result = await db.execute(
-        select(Class).where(Class.id == class_id)
+        select(Class).where(Class.id == class_id, Class.deleted_at.is_(None))
     )
     class_ = result.scalar_one_or_none()
     
@@ -135,63 +180,60 @@ async def get_class_attendance(
             detail="Class not found"
         )
     
+    etag, last_modified = await attendance_version(
+        db, request, f"class:{class_id}", Attendance.class_id == class_id
+    )
+    if etag_matches(request, etag):
+        return not_modified(etag, last_modified, vary=VARY_HEADER)
+    
     result = await db.execute(
         select(Attendance, User, Class)
         .join(User, Attendance.student_id == User.id)
-        .join(Class, Attendance.class_id == Class.id)
+        .join(Class, (Attendance.class_id == Class.id) & Class.deleted_at.is_(None))
         .where(Attendance.class_id == class_id)
         .order_by(Attendance.marked_at.desc())
     )
     
-    attendance_records = []
-    for attendance, user, class_ in result.all():
-        attendance_records.append(
-            AttendanceWithDetails(
-                id=attendance.id,
-                student_id=attendance.student_id,
-                class_id=attendance.class_id,
-                latitude=attendance.latitude,
-                longitude=attendance.longitude,
-                distance=attendance.distance,
-                status=attendance.status,
-                marked_at=attendance.marked_at,
-                student_name=user.full_name,
-                class_name=class_.name,
-                class_code=class_.code
-            )
-        )
+    attendance_records = [
+        AttendanceWithDetails.from_records(attendance, user, class_)
+        for attendance, user, class_ in result.all()
+    ]
     
-    return attendance_records
+    return await encoded_response(
+        request,
+        attendance_records,
+        dictionary_fields=DICTIONARY_FIELDS,
+        headers=cache_headers(etag, last_modified)
+    )
 
 @router.get("/my-attendance", response_model=List[AttendanceWithDetails])
 async def get_my_attendance(
+    request: Request,
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
+    etag, last_modified = await attendance_version(
+        db, request, f"student:{current_user.id}", Attendance.student_id == current_user.id
+    )
+    if etag_matches(request, etag):
+        return not_modified(etag, last_modified, vary=VARY_HEADER)
+    
     result = await db.execute(
         select(Attendance, User, Class)
         .join(User, Attendance.student_id == User.id)
-        .join(Class, Attendance.class_id == Class.id)
+        .join(Class, (Attendance.class_id == Class.id) & Class.deleted_at.is_(None))
         .where(Attendance.student_id == current_user.id)
         .order_by(Attendance.marked_at.desc())
     )
     
-    attendance_records = []
-    for attendance, user, class_ in result.all():
-        attendance_records.append(
-            AttendanceWithDetails(
-                id=attendance.id,
-                student_id=attendance.student_id,
-                class_id=attendance.class_id,
-                latitude=attendance.latitude,
-                longitude=attendance.longitude,
-                distance=attendance.distance,
-                status=attendance.status,
-                marked_at=attendance.marked_at,
-                student_name=user.full_name,
-                class_name=class_.name,
-                class_code=class_.code
-            )
-        )
-    
-    return attendance_records
\ No newline at end of file
+    attendance_records = [
+        AttendanceWithDetails.from_records(attendance, user, class_)
+        for attendance, user, class_ in result.all()
+    ]
+    
+    return await encoded_response(
+        request,
+        attendance_records,
+        dictionary_fields=DICTIONARY_FIELDS,
+        headers=cache_headers(etag, last_modified)
+    )
\ No newline at end of file
@@ -1,21 +1,63 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
-from datetime import timedelta
+from sqlalchemy import select, update
+from datetime import datetime, timedelta
+from jose import JWTError
+from typing import Optional, Tuple
 
 from database import get_db
-from models import User
-from schemas import UserCreate, UserResponse, UserLogin, Token
+from models import User, RefreshToken, RevokedToken
+from schemas import UserCreate, UserResponse, UserLogin, Token, RefreshRequest, LogoutRequest
 from auth import (
     get_password_hash,
     verify_password,
     create_access_token,
+    create_refresh_token,
+    decode_token,
     ACCESS_TOKEN_EXPIRE_MINUTES,
-    get_current_user
+    get_current_user,
+    get_current_admin,
+    oauth2_scheme
 )
+from utils.revocation import revocation_list
 
 router = APIRouter(prefix="/auth", tags=["Authentication"])
 
+def issue_tokens(db: AsyncSession, user: User, family_id: Optional[str] = None) -> Tuple[dict, RefreshToken]:
+    access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+    access_token = create_access_token(
+        data={
+            "sub": user.id,
+            "username": user.username,
+            "role": user.role.value
+        },
+        expires_delta=access_token_expires
+    )
+    
+    refresh_token, jti, family_id, expires_at = create_refresh_token(user.id, family_id)
+    stored_token = RefreshToken(
+        jti=jti,
+        family_id=family_id,
+        user_id=user.id,
+        expires_at=expires_at
+    )
+    db.add(stored_token)
+    
+    tokens = {
+        "access_token": access_token,
+        "refresh_token": refresh_token,
+        "token_type": "bearer",
+        "expires_in": int(access_token_expires.total_seconds())
+    }
+    return tokens, stored_token
+
+async def revoke_refresh_family(db: AsyncSession, family_id: str):
+    await db.execute(
+        update(RefreshToken)
+        .where(RefreshToken.family_id == family_id, RefreshToken.revoked_at.is_(None))
+        .values(revoked_at=datetime.utcnow())
+    )
+
 @router.post("/register", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
 async def register_user(
     user_data: UserCreate,
@@ -73,17 +115,135 @@ async def login(
             headers={"WWW-Authenticate": "Bearer"},
         )
     
-    access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
-    access_token = create_access_token(
-        data={
-            "sub": user.id,
-            "username": user.username,
-            "role": user.role.value
-        },
-        expires_delta=access_token_expires
+    tokens, _ = issue_tokens(db, user)
+    await db.commit()
+    
+    return tokens
+
+@router.post("/refresh", response_model=Token)
+async def refresh_access_token(
+    refresh_data: RefreshRequest,
+    db: AsyncSession = Depends(get_db)
+):
+    credentials_exception = HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Invalid refresh token",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+    
+    try:
+        payload = decode_token(refresh_data.refresh_token, expected_type="refresh")
+        user_id = int(payload.get("sub"))
+    except (JWTError, TypeError, ValueError):
+        raise credentials_exception
+    
+    result = await db.execute(
+        select(RefreshToken).where(RefreshToken.jti == payload.get("jti"))
     )
+    stored_token = result.scalar_one_or_none()
+    
+    if stored_token is None or stored_token.user_id != user_id:
+        raise credentials_exception
+    
+    if stored_token.revoked_at is not None:
+        # A rotated token being presented again means it leaked: end the whole chain
+        if stored_token.replaced_by is not None:
+            await revoke_refresh_family(db, stored_token.family_id)
+            await db.commit()
+        raise credentials_exception
+    
+    result = await db.execute(select(User).where(User.id == user_id))
+    user = result.scalar_one_or_none()
+    
+    if user is None:
+        raise credentials_exception
+    
+    family_id = stored_token.family_id
+    tokens, new_token = issue_tokens(db, user, family_id=family_id)
+    
+    # Only one of several concurrent refreshes with the same token can win
+    # this; the others are handled like reuse of a rotated token
+    result = await db.execute(
+        update(RefreshToken)
+        .where(RefreshToken.jti == stored_token.jti, RefreshToken.revoked_at.is_(None))
+        .values(revoked_at=datetime.utcnow(), replaced_by=new_token.jti)
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount != 1:
+        await db.rollback()
+        await revoke_refresh_family(db, family_id)
+        await db.commit()
+        raise credentials_exception
+    
+    await db.commit()
+    
+    return tokens
+
+@router.post("/logout", status_code=status.HTTP_204_NO_CONTENT)
+async def logout(
+    logout_data: Optional[LogoutRequest] = None,
+    token: str = Depends(oauth2_scheme),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    payload = decode_token(token)
+    jti = payload.get("jti")
+    
+    if jti:
+        db.add(RevokedToken(
+            jti=jti,
+            user_id=current_user.id,
+            expires_at=datetime.utcfromtimestamp(payload["exp"])
+        ))
+    
+    if logout_data and logout_data.refresh_token:
+        try:
+            refresh_payload = decode_token(logout_data.refresh_token, expected_type="refresh")
+        except JWTError:
+            refresh_payload = None
+        
+        if refresh_payload and refresh_payload.get("sub") == str(current_user.id):
+            await revoke_refresh_family(db, refresh_payload.get("fam"))
+    
+    await db.commit()
+    
+    if jti:
+        revocation_list.add_jti(jti)
+    
+    return None
+
+@router.post("/users/{user_id}/revoke-sessions", status_code=status.HTTP_204_NO_CONTENT)
+async def revoke_user_sessions(
+    user_id: int,
+    current_user: User = Depends(get_current_admin),
+    db: AsyncSession = Depends(get_db)
+):
+    result = await db.execute(select(User).where(User.id == user_id))
+    user = result.scalar_one_or_none()
+    
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User not found"
+        )
+    
+    revoked_at = datetime.utcnow()
+    db.add(RevokedToken(
+        jti=None,
+        user_id=user_id,
+        revoked_at=revoked_at,
+        expires_at=revoked_at + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+    ))
+    await db.execute(
+        update(RefreshToken)
+        .where(RefreshToken.user_id == user_id, RefreshToken.revoked_at.is_(None))
+        .values(revoked_at=revoked_at)
+    )
+    await db.commit()
+    
+    revocation_list.revoke_user(user_id, revoked_at)
     
-    return {"access_token": access_token, "token_type": "bearer"}
+    return None
 
 @router.get("/me", response_model=UserResponse)
 async def get_current_user_info(
@@ -1,16 +1,62 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, Request, Response, status
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
-from typing import List
-from datetime import timedelta
+from sqlalchemy import select, func, or_
+from typing import List, Optional
+from datetime import datetime, timedelta
+import base64
+import binascii
 
 from database import get_db
-from models import Class, User
-from schemas import ClassCreate, ClassResponse
+from models import Attendance, Class, ClassPurgeJob, ClassTombstone, User, UserRole
+from schemas import (
+    ClassCreate,
+    ClassResponse,
+    ClassSuggestion,
+    ClassSearchResponse,
+    SessionCodeResponse,
+    ClassPurgeJobResponse
+)
 from auth import get_current_active_lecturer, get_current_user
+from utils.http_cache import make_etag, etag_matches, not_modified, apply_cache_headers
+from utils.class_index import class_code_index
+from utils.dashboard_cache import invalidate_lecturer
+from utils.session_codes import current_code, SESSION_CODE_STEP_SECONDS
+from utils.class_purge import run_purge_job
 
 router = APIRouter(prefix="/classes", tags=["Classes"])
 
+async def classes_version(db: AsyncSession):
+    result = await db.execute(
+        select(func.count(Class.id), func.max(Class.id), func.max(Class.created_at))
+        .where(Class.deleted_at.is_(None))
+    )
+    count, max_id, last_modified = result.one()
+    return make_etag("classes", count, max_id, last_modified), last_modified
+
+SEARCHABLE_FIELDS = list(ClassResponse.model_fields)
+
+def encode_cursor(code: str) -> str:
+    return base64.urlsafe_b64encode(code.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> str:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        return base64.urlsafe_b64decode(padded.encode()).decode()
+    except (binascii.Error, UnicodeDecodeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+
+def deleted_code(code: str, class_id: int) -> str:
+    return f"{code}~deleted~{class_id}"
+
+def like_pattern(term: str, match: str) -> str:
+    escaped = term.lower().replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    if match == "contains":
+        return f"%{escaped}%"
+    return f"{escaped}%"
+
 @router.post("/create", response_model=ClassResponse, status_code=status.HTTP_201_CREATED)
 async def create_class(
     class_data: ClassCreate,
@@ -21,6 +67,12 @@ async def create_class(
         select(Class).where(Class.code == class_data.code)
     )
     existing_class = result.scalar_one_or_none()
+    if existing_class and existing_class.deleted_at is not None:
+        # Classes deleted before codes were moved aside keep theirs until purged
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Class code belongs to a deleted class that is still being purged; try again later"
+        )
     if existing_class:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -34,6 +86,8 @@ async def create_class(
         latitude=class_data.latitude,
         longitude=class_data.longitude,
         radius=class_data.radius,
+        geofence=class_data.geofence.model_dump() if class_data.geofence else None,
+        require_session_code=class_data.require_session_code,
         lecturer_id=current_user.id
     )
     
@@ -41,17 +95,106 @@ async def create_class(
     await db.commit()
     await db.refresh(new_class)
     
+    class_code_index.add(new_class.id, new_class.code, new_class.name)
+    invalidate_lecturer(current_user.id)
+    
     return new_class
 
 @router.get("/", response_model=List[ClassResponse])
 async def get_all_classes(
+    request: Request,
+    response: Response,
     current_user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
-    result = await db.execute(select(Class))
+    etag, last_modified = await classes_version(db)
+    if etag_matches(request, etag):
+        return not_modified(etag, last_modified)
+    apply_cache_headers(response, etag, last_modified)
+    
+    result = await db.execute(select(Class).where(Class.deleted_at.is_(None)))
     classes = result.scalars().all()
     return classes
 
+@router.get("/autocomplete", response_model=List[ClassSuggestion])
+async def autocomplete_classes(
+    prefix: str = Query(..., min_length=1),
+    limit: int = Query(10, ge=1, le=50),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    await class_code_index.ensure_loaded(db)
+    return class_code_index.search(prefix, limit)
+
+@router.get("/search", response_model=ClassSearchResponse)
+async def search_classes(
+    q: Optional[str] = Query(None, min_length=1),
+    match: str = Query("prefix", pattern="^(prefix|contains)$"),
+    lecturer_id: Optional[int] = None,
+    min_lat: Optional[float] = Query(None, ge=-90, le=90),
+    max_lat: Optional[float] = Query(None, ge=-90, le=90),
+    min_lon: Optional[float] = Query(None, ge=-180, le=180),
+    max_lon: Optional[float] = Query(None, ge=-180, le=180),
+    fields: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    if fields:
+        selected = [field.strip() for field in fields.split(",") if field.strip()]
+        unknown = [field for field in selected if field not in SEARCHABLE_FIELDS]
+        if unknown:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Unknown fields: {', '.join(unknown)}"
+            )
+    else:
+        selected = SEARCHABLE_FIELDS
+    
+    columns = [getattr(Class, field) for field in selected]
+    if "code" not in selected:
+        columns.append(Class.code)
+    
+    query = select(*columns).where(Class.deleted_at.is_(None))
+    
+    if q:
+        pattern = like_pattern(q, match)
+        query = query.where(or_(
+            func.lower(Class.code).like(pattern, escape="\\"),
+            func.lower(Class.name).like(pattern, escape="\\")
+        ))
+    
+    if lecturer_id is not None:
+        query = query.where(Class.lecturer_id == lecturer_id)
+    
+    bbox = (min_lat, max_lat, min_lon, max_lon)
+    if any(value is not None for value in bbox):
+        if any(value is None for value in bbox):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Bounding box requires min_lat, max_lat, min_lon and max_lon"
+            )
+        query = query.where(
+            Class.latitude.between(min_lat, max_lat),
+            Class.longitude.between(min_lon, max_lon)
+        )
+    
+    if cursor:
+        query = query.where(Class.code > decode_cursor(cursor))
+    
+    result = await db.execute(query.order_by(Class.code).limit(limit + 1))
+    rows = result.all()
+    
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].code)
+    
+    items = [{field: getattr(row, field) for field in selected} for row in rows]
+    
+    return {"items": items, "next_cursor": next_cursor}
+
 @router.get("/{class_id}", response_model=ClassResponse)
 async def get_class(
     class_id: int,
@@ -59,7 +202,7 @@ async def get_class(
     db: AsyncSession = Depends(get_db)
 ):
     result = await db.execute(
-        select(Class).where(Class.id == class_id)
+        select(Class).where(Class.id == class_id, Class.deleted_at.is_(None))
     )
     class_ = result.scalar_one_or_none()
     
@@ -71,6 +214,38 @@ async def get_class(
     
     return class_
 
+@router.get("/{class_id}/session-code", response_model=SessionCodeResponse)
+async def get_session_code(
+    class_id: int,
+    current_user: User = Depends(get_current_active_lecturer),
+    db: AsyncSession = Depends(get_db)
+):
+    result = await db.execute(
+        select(Class).where(Class.id == class_id, Class.deleted_at.is_(None))
+    )
+    class_ = result.scalar_one_or_none()
+    
+    if not class_:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Class not found"
+        )
+    
+    if class_.lecturer_id != current_user.id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="You can only display codes for your own classes"
+        )
+    
+    code, expires_in = current_code(class_.id)
+    
+    return {
+        "class_id": class_.id,
+        "code": code,
+        "expires_in": expires_in,
+        "step_seconds": SESSION_CODE_STEP_SECONDS
+    }
+
 @router.get("/code/{class_code}", response_model=ClassResponse)
 async def get_class_by_code(
     class_code: str,
@@ -78,7 +253,7 @@ async def get_class_by_code(
     db: AsyncSession = Depends(get_db)
 ):
     result = await db.execute(
-        select(Class).where(Class.code == class_code)
+        select(Class).where(Class.code == class_code, Class.deleted_at.is_(None))
     )
     class_ = result.scalar_one_or_none()
     
@@ -90,14 +265,31 @@ async def get_class_by_code(
     
     return class_
 
-@router.delete("/{class_id}", status_code=status.HTTP_204_NO_CONTENT)
+@router.get("/delete-jobs/{job_id}", response_model=ClassPurgeJobResponse)
+async def get_delete_job(
+    job_id: int,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    job = await db.get(ClassPurgeJob, job_id)
+    
+    if not job or (job.requested_by != current_user.id and current_user.role != UserRole.ADMIN):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Delete job not found"
+        )
+    
+    return job
+
+@router.delete("/{class_id}", response_model=ClassPurgeJobResponse, status_code=status.HTTP_202_ACCEPTED)
 async def delete_class(
     class_id: int,
+    background_tasks: BackgroundTasks,
     current_user: User = Depends(get_current_active_lecturer),
     db: AsyncSession = Depends(get_db)
 ):
     result = await db.execute(
-        select(Class).where(Class.id == class_id)
+        select(Class).where(Class.id == class_id, Class.deleted_at.is_(None))
     )
     class_ = result.scalar_one_or_none()
     
@@ -113,7 +305,32 @@ async def delete_class(
             detail="You can only delete your own classes"
         )
     
-    await db.delete(class_)
+    result = await db.execute(
+        select(func.count(Attendance.id)).where(Attendance.class_id == class_id)
+    )
+    
+    # Queries stop returning the class as soon as this commits, and this
+    # worker's caches drop it below. Other workers drop it from autocomplete
+    # and their dashboard cache on their next class index sync (at most
+    # CLASS_INDEX_SYNC_SECONDS). Attendance rows and the class row itself
+    # are removed in bounded chunks by the purge job.
+    # The code is moved aside so it can be reused straight away, even if
+    # the purge is slow or fails; the tombstone keeps the original.
+    code = class_.code
+    class_.deleted_at = datetime.utcnow()
+    class_.code = deleted_code(code, class_.id)
+    db.add(ClassTombstone(class_id=class_.id, code=code))
+    job = ClassPurgeJob(
+        class_id=class_.id,
+        requested_by=current_user.id,
+        total_rows=result.scalar() or 0
+    )
+    db.add(job)
     await db.commit()
+    await db.refresh(job)
+    
+    class_code_index.remove(code, class_.id)
+    invalidate_lecturer(current_user.id)
+    background_tasks.add_task(run_purge_job, job.id)
     
-    return None
\ No newline at end of file
+    return job
\ No newline at end of file
@@ -0,0 +1,116 @@
+from fastapi import APIRouter, Depends, Query
+from typing import List
+from sqlalchemy import select, func
+from datetime import datetime, timedelta
+import asyncio
+
+from database import async_session_maker
+from models import Attendance, AttendanceDailySummary, Class, User, AttendanceStatus
+from schemas import ClassResponse, DashboardClassSummary, LecturerDashboard, AttendanceWithDetails, AttendanceDaySummary
+from auth import get_current_active_lecturer
+from utils.dashboard_cache import dashboard_cache
+
+router = APIRouter(prefix="/dashboard", tags=["Dashboard"])
+
+async def fetch_lecturer_classes(lecturer_id: int):
+    async with async_session_maker() as session:
+        result = await session.execute(
+            select(Class)
+            .where(Class.lecturer_id == lecturer_id, Class.deleted_at.is_(None))
+            .order_by(Class.code)
+        )
+        return result.scalars().all()
+
+async def fetch_today_counts(lecturer_id: int):
+    today_start = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+    today_end = today_start + timedelta(days=1)
+    
+    async with async_session_maker() as session:
+        result = await session.execute(
+            select(Attendance.class_id, Attendance.status, func.count(Attendance.id))
+            .join(Class, (Attendance.class_id == Class.id) & Class.deleted_at.is_(None))
+            .where(
+                Class.lecturer_id == lecturer_id,
+                Attendance.marked_at >= today_start,
+                Attendance.marked_at < today_end
+            )
+            .group_by(Attendance.class_id, Attendance.status)
+        )
+        
+        counts = {}
+        for class_id, attendance_status, count in result.all():
+            counts.setdefault(class_id, {})[attendance_status] = count
+        return counts
+
+async def fetch_recent_marks(lecturer_id: int, limit: int):
+    async with async_session_maker() as session:
+        result = await session.execute(
+            select(Attendance, User, Class)
+            .join(User, Attendance.student_id == User.id)
+            .join(Class, (Attendance.class_id == Class.id) & Class.deleted_at.is_(None))
+            .where(Class.lecturer_id == lecturer_id)
+            .order_by(Attendance.marked_at.desc())
+            .limit(limit)
+        )
+        return [
+            AttendanceWithDetails.from_records(attendance, user, class_)
+            for attendance, user, class_ in result.all()
+        ]
+
+@router.get("/lecturer", response_model=LecturerDashboard)
+async def get_lecturer_dashboard(
+    recent: int = Query(20, ge=0, le=200),
+    current_user: User = Depends(get_current_active_lecturer)
+):
+    cache_key = (current_user.id, recent)
+    cached = dashboard_cache.get(cache_key)
+    if cached is not None:
+        return cached
+    
+    # Each query runs on its own pooled session so they overlap on the wire
+    classes, counts, recent_marks = await asyncio.gather(
+        fetch_lecturer_classes(current_user.id),
+        fetch_today_counts(current_user.id),
+        fetch_recent_marks(current_user.id, recent) if recent else asyncio.sleep(0, result=[])
+    )
+    
+    summaries = []
+    for class_ in classes:
+        class_counts = counts.get(class_.id, {})
+        summaries.append(
+            DashboardClassSummary(
+                **ClassResponse.model_validate(class_).model_dump(),
+                today_total=sum(class_counts.values()),
+                today_approved=class_counts.get(AttendanceStatus.APPROVED, 0),
+                today_denied=class_counts.get(AttendanceStatus.DENIED, 0),
+                today_pending=class_counts.get(AttendanceStatus.PENDING, 0)
+            )
+        )
+    
+    dashboard = LecturerDashboard(
+        generated_at=datetime.utcnow(),
+        classes=summaries,
+        recent_marks=recent_marks
+    )
+    dashboard_cache.set(cache_key, dashboard)
+    
+    return dashboard
+
+
+@router.get("/lecturer/history", response_model=List[AttendanceDaySummary])
+async def get_lecturer_history(
+    days: int = Query(30, ge=1, le=366),
+    current_user: User = Depends(get_current_active_lecturer)
+):
+    # Served from the summaries the finalisation job keeps for closed days,
+    # so this never aggregates raw attendance rows
+    since = datetime.utcnow().date() - timedelta(days=days)
+    
+    async with async_session_maker() as session:
+        result = await session.execute(
+            select(AttendanceDailySummary)
+            .join(Class, (AttendanceDailySummary.class_id == Class.id) & Class.deleted_at.is_(None))
+            .where(Class.lecturer_id == current_user.id, AttendanceDailySummary.day >= since)
+            .order_by(AttendanceDailySummary.day.desc(), AttendanceDailySummary.class_id)
+        )
+        return result.scalars().all()
\ No newline at end of file
@@ -0,0 +1,180 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, func
+from typing import Optional, Tuple
+from datetime import datetime, timedelta
+import base64
+import binascii
+import json
+import os
+
+from database import get_db
+from models import Attendance, Class, ClassTombstone, User
+from schemas import SyncResponse, AttendanceWithDetails
+from auth import get_current_user
+from utils.revocation import to_micros
+
+try:
+    SYNC_SETTLE_SECONDS = float(os.getenv("SYNC_SETTLE_SECONDS", 10))
+except (TypeError, ValueError):
+    SYNC_SETTLE_SECONDS = 10.0
+
+router = APIRouter(prefix="/sync", tags=["Sync"])
+
+def encode_sync_cursor(state: dict) -> str:
+    raw = json.dumps(state, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+EPOCH = datetime(1970, 1, 1)
+
+def from_micros(value: int) -> datetime:
+    return EPOCH + timedelta(microseconds=value)
+
+def advance(current: int, rows, get_id, get_time, settled_before: datetime) -> Tuple[int, bool]:
+    # Ids are assigned at INSERT but become visible at COMMIT, possibly out
+    # of order, so the cursor only moves past rows old enough that every
+    # lower id has committed. Newer rows are still returned, and sent again
+    # next time; clients upsert by id.
+    for row in rows:
+        written_at = get_time(row)
+        if written_at is not None and written_at > settled_before:
+            return current, True
+        current = get_id(row)
+    return current, False
+
+def decode_sync_cursor(cursor: str) -> dict:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        state = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        decoded = {key: int(state[key]) for key in ("c", "t", "a")}
+        # Cursors issued before status updates were tracked have no "u"/"v"
+        decoded["u"] = int(state.get("u", 0))
+        decoded["v"] = int(state.get("v", 0))
+        return decoded
+    except (binascii.Error, ValueError, TypeError, KeyError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid sync cursor"
+        )
+
+@router.get("", response_model=SyncResponse)
+async def sync_changes(
+    since: Optional[str] = None,
+    limit: int = Query(1000, ge=1, le=5000),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    full = since is None
+    state = {"c": 0, "t": 0, "a": 0, "u": 0, "v": 0} if full else decode_sync_cursor(since)
+    
+    settled_before = datetime.utcnow() - timedelta(seconds=SYNC_SETTLE_SECONDS)
+    held_back = False
+    
+    result = await db.execute(
+        select(Class)
+        .where(Class.id > state["c"], Class.deleted_at.is_(None))
+        .order_by(Class.id)
+        .limit(limit + 1)
+    )
+    classes = result.scalars().all()
+    has_more = len(classes) > limit
+    classes = classes[:limit]
+    state["c"], waiting = advance(
+        state["c"], classes, lambda row: row.id, lambda row: row.created_at, settled_before
+    )
+    held_back = held_back or waiting
+    
+    deleted_class_ids = []
+    if full:
+        # A fresh client has nothing to delete; just start after the settled tombstones
+        result = await db.execute(
+            select(func.max(ClassTombstone.id)).where(ClassTombstone.deleted_at <= settled_before)
+        )
+        state["t"] = result.scalar() or 0
+    else:
+        result = await db.execute(
+            select(ClassTombstone.id, ClassTombstone.class_id, ClassTombstone.deleted_at)
+            .where(ClassTombstone.id > state["t"])
+            .order_by(ClassTombstone.id)
+        )
+        tombstones = result.all()
+        deleted_class_ids = [tombstone.class_id for tombstone in tombstones]
+        state["t"], waiting = advance(
+            state["t"], tombstones, lambda row: row.id, lambda row: row.deleted_at, settled_before
+        )
+        held_back = held_back or waiting
+    
+    result = await db.execute(
+        select(Attendance, User, Class)
+        .join(User, Attendance.student_id == User.id)
+        .join(Class, (Attendance.class_id == Class.id) & Class.deleted_at.is_(None))
+        .where(
+            Attendance.student_id == current_user.id,
+            Attendance.id > state["a"]
+        )
+        .order_by(Attendance.id)
+        .limit(limit + 1)
+    )
+    rows = result.all()
+    has_more = has_more or len(rows) > limit
+    rows = rows[:limit]
+    next_a, waiting = advance(
+        state["a"], rows, lambda row: row[0].id, lambda row: row[0].marked_at, settled_before
+    )
+    held_back = held_back or waiting
+    
+    if full:
+        # New rows already carry their current status
+        result = await db.execute(
+            select(func.max(Attendance.updated_at))
+            .where(Attendance.student_id == current_user.id)
+        )
+        last_updated = result.scalar()
+        if last_updated is not None and last_updated > settled_before:
+            last_updated = settled_before
+        state["u"] = to_micros(last_updated) if last_updated else 0
+        state["v"] = 0
+    else:
+        # Rows the client already has whose status changed since the last sync;
+        # "v" breaks ties between rows finalised with the same timestamp
+        updated_since = from_micros(state["u"])
+        result = await db.execute(
+            select(Attendance, User, Class)
+            .join(User, Attendance.student_id == User.id)
+            .join(Class, (Attendance.class_id == Class.id) & Class.deleted_at.is_(None))
+            .where(
+                Attendance.student_id == current_user.id,
+                Attendance.id <= state["a"],
+                (Attendance.updated_at > updated_since)
+                | ((Attendance.updated_at == updated_since) & (Attendance.id > state["v"]))
+            )
+            .order_by(Attendance.updated_at, Attendance.id)
+            .limit(limit + 1)
+        )
+        updated = result.all()
+        has_more = has_more or len(updated) > limit
+        updated = updated[:limit]
+        for attendance, _, _ in updated:
+            if attendance.updated_at > settled_before:
+                held_back = True
+                break
+            state["u"] = to_micros(attendance.updated_at)
+            state["v"] = attendance.id
+        rows = updated + rows
+    
+    state["a"] = next_a
+    # A held-back cursor would hand the same page straight back; let the
+    # client come back on its normal schedule instead
+    has_more = has_more and not held_back
+    
+    return {
+        "cursor": encode_sync_cursor(state),
+        "full": full,
+        "has_more": has_more,
+        "classes": classes,
+        "deleted_class_ids": deleted_class_ids,
+        "attendance": [
+            AttendanceWithDetails.from_records(attendance, user, class_)
+            for attendance, user, class_ in rows
+        ]
+    }
@@ -1,7 +1,8 @@
-from pydantic import BaseModel, EmailStr, Field
-from typing import Optional
-from datetime import datetime
-from models import UserRole, AttendanceStatus
+from pydantic import BaseModel, EmailStr, Field, model_validator
+from typing import Optional, List, Dict, Any, Literal
+from datetime import date, datetime
+from models import UserRole, AttendanceStatus, PurgeJobStatus
+from utils.geofence import get_compiled_geofence, count_vertices, GEOFENCE_MAX_VERTICES
 
 class UserBase(BaseModel):
     email: EmailStr
@@ -25,13 +26,37 @@ class UserLogin(BaseModel):
 
 class Token(BaseModel):
     access_token: str
+    refresh_token: Optional[str] = None
     token_type: str = "bearer"
+    expires_in: Optional[int] = None
+
+class RefreshRequest(BaseModel):
+    refresh_token: str
+
+class LogoutRequest(BaseModel):
+    refresh_token: Optional[str] = None
 
 class TokenData(BaseModel):
     user_id: Optional[int] = None
     username: Optional[str] = None
     role: Optional[UserRole] = None
 
+class GeofenceGeometry(BaseModel):
+    type: Literal["Polygon", "MultiPolygon"]
+    coordinates: List[Any] = Field(..., description="GeoJSON coordinates, positions as [longitude, latitude]")
+    
+    # Only a count, so responses stay cheap; ClassCreate does the full check
+    @model_validator(mode="after")
+    def check_size(self):
+        polygons = [self.coordinates] if self.type == "Polygon" else self.coordinates
+        try:
+            vertices = count_vertices(polygons)
+        except TypeError:
+            raise ValueError("Invalid geofence: malformed coordinates")
+        if vertices > GEOFENCE_MAX_VERTICES:
+            raise ValueError(f"Invalid geofence: more than {GEOFENCE_MAX_VERTICES} vertices")
+        return self
+
 class ClassBase(BaseModel):
     name: str
     code: str
@@ -39,9 +64,20 @@ class ClassBase(BaseModel):
     latitude: float = Field(..., ge=-90, le=90)
     longitude: float = Field(..., ge=-180, le=180)
     radius: float = Field(..., gt=0, description="Radius in meters")
+    geofence: Optional[GeofenceGeometry] = Field(None, description="Polygon geofence, used instead of the radius when set")
+    require_session_code: bool = False
 
 class ClassCreate(ClassBase):
-    pass
+    # Only checked on input; compiling goes through the same cache that
+    # attendance marking uses, so responses never rebuild the index
+    @model_validator(mode="after")
+    def check_geofence(self):
+        if self.geofence is not None:
+            try:
+                get_compiled_geofence(self.geofence.model_dump())
+            except (TypeError, ValueError, IndexError) as exc:
+                raise ValueError(f"Invalid geofence: {exc}")
+        return self
 
 class ClassResponse(ClassBase):
     id: int
@@ -51,13 +87,43 @@ class ClassResponse(ClassBase):
     class Config:
         from_attributes = True
 
+class ClassPurgeJobResponse(BaseModel):
+    id: int
+    class_id: int
+    status: PurgeJobStatus
+    total_rows: int
+    processed_rows: int
+    attempts: int = 0
+    error: Optional[str] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    
+    class Config:
+        from_attributes = True
+
+class SessionCodeResponse(BaseModel):
+    class_id: int
+    code: str
+    expires_in: int
+    step_seconds: int
+
+class ClassSuggestion(BaseModel):
+    id: int
+    code: str
+    name: str
+
+class ClassSearchResponse(BaseModel):
+    items: List[Dict[str, Any]]
+    next_cursor: Optional[str] = None
+
 class AttendanceBase(BaseModel):
     class_id: int
     latitude: float = Field(..., ge=-90, le=90)
     longitude: float = Field(..., ge=-180, le=180)
 
 class AttendanceCreate(AttendanceBase):
-    pass
+    session_code: Optional[str] = Field(None, max_length=10, pattern=r"^\d+$", description="Rotating code displayed by the lecturer")
 
 class AttendanceResponse(BaseModel):
     id: int
@@ -78,4 +144,77 @@ class AttendanceWithDetails(AttendanceResponse):
     class_code: str
     
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+    
+    @classmethod
+    def from_records(cls, attendance, user, class_) -> "AttendanceWithDetails":
+        return cls(
+            id=attendance.id,
+            student_id=attendance.student_id,
+            class_id=attendance.class_id,
+            latitude=attendance.latitude,
+            longitude=attendance.longitude,
+            distance=attendance.distance,
+            status=attendance.status,
+            marked_at=attendance.marked_at,
+            student_name=user.full_name,
+            class_name=class_.name,
+            class_code=class_.code
+        )
+
+class DashboardClassSummary(ClassResponse):
+    today_total: int = 0
+    today_approved: int = 0
+    today_denied: int = 0
+    today_pending: int = 0
+
+class LecturerDashboard(BaseModel):
+    generated_at: datetime
+    classes: List[DashboardClassSummary]
+    recent_marks: List[AttendanceWithDetails]
+
+class AttendanceDaySummary(BaseModel):
+    class_id: int
+    day: date
+    approved: int
+    denied: int
+    pending: int
+    
+    class Config:
+        from_attributes = True
+
+class SyncResponse(BaseModel):
+    cursor: str
+    full: bool
+    has_more: bool
+    classes: List[ClassResponse]
+    deleted_class_ids: List[int]
+    attendance: List[AttendanceWithDetails]
+
+class SlowQueryEntry(BaseModel):
+    recorded_at: datetime
+    duration_ms: float
+    statement: str
+    parameters: Any
+    route: Optional[str] = None
+    explain: Optional[List[str]] = None
+
+class ScheduledJobMetrics(BaseModel):
+    name: str
+    interval_seconds: float
+    exclusive: bool
+    runs: int
+    failures: int
+    skipped: int
+    last_started_at: Optional[datetime] = None
+    last_finished_at: Optional[datetime] = None
+    last_duration_ms: Optional[float] = None
+    last_result: Optional[Dict[str, Any]] = None
+    last_error: Optional[str] = None
+
+class StartupReport(BaseModel):
+    started_at: datetime
+    ready_at: Optional[datetime] = None
+    total_ms: Optional[float] = None
+    phases: Dict[str, float]
+    details: Dict[str, Any]
\ No newline at end of file
@@ -0,0 +1,94 @@
+import math
+import random
+
+import pytest
+
+from utils.geofence import GEOFENCE_MAX_VERTICES, compile_geofence
+
+# Positions are GeoJSON [longitude, latitude]
+SQUARE_WITH_HOLE = {
+    "type": "Polygon",
+    "coordinates": [
+        [[0, 0], [4, 0], [4, 4], [0, 4], [0, 0]],
+        [[1, 1], [3, 1], [3, 3], [1, 3], [1, 1]],
+    ],
+}
+
+NOTCHED = {
+    "type": "Polygon",
+    "coordinates": [[[0, 0], [4, 0], [4, 4], [2, 2], [0, 4], [0, 0]]],
+}
+
+TWO_PARTS = {
+    "type": "MultiPolygon",
+    "coordinates": [
+        [[[0, 0], [1, 0], [1, 1], [0, 1], [0, 0]]],
+        [[[2, 0], [3, 0], [3, 1], [2, 1], [2, 0]]],
+    ],
+}
+
+def ray_cast(geometry, lat, lon):
+    polygons = [geometry["coordinates"]] if geometry["type"] == "Polygon" else geometry["coordinates"]
+    inside = False
+    for polygon in polygons:
+        for ring in polygon:
+            for (x1, y1), (x2, y2) in zip(ring, ring[1:] + ring[:1]):
+                if (y1 > lat) != (y2 > lat) and lon < x1 + (lat - y1) * (x2 - x1) / (y2 - y1):
+                    inside = not inside
+    return inside
+
+def test_hole_is_outside():
+    geofence = compile_geofence(SQUARE_WITH_HOLE)
+    assert geofence.contains(0.5, 0.5)
+    assert geofence.contains(3.5, 2)
+    assert not geofence.contains(2, 2)
+    assert not geofence.contains(1.5, 2.5)
+
+def test_multipolygon_parts():
+    geofence = compile_geofence(TWO_PARTS)
+    assert geofence.contains(0.5, 0.5)
+    assert geofence.contains(0.5, 2.5)
+    assert not geofence.contains(0.5, 1.5)
+
+@pytest.mark.parametrize("lat, lon, expected", [
+    (2, 1, True),
+    (2, 3, True),
+    (1, 0.5, True),
+    (3, 0.5, True),
+    (3, 2, False),
+    (3, 3.5, True),
+    (4, 2, False),
+])
+def test_points_at_vertex_latitudes(lat, lon, expected):
+    assert compile_geofence(NOTCHED).contains(lat, lon) is expected
+
+@pytest.mark.parametrize("lat, lon", [
+    (-1e-9, 2),
+    (4 + 1e-9, 2),
+    (2, -1e-9),
+    (2, 4 + 1e-9),
+    (50, 50),
+])
+def test_points_just_outside_bounding_box(lat, lon):
+    assert not compile_geofence(SQUARE_WITH_HOLE).contains(lat, lon)
+
+def test_matches_ray_cast_on_irregular_ring():
+    rng = random.Random(7)
+    count = 200
+    ring = []
+    for i in range(count):
+        angle = 2 * math.pi * i / count
+        radius = 0.005 * (1 + 0.5 * rng.random())
+        ring.append([3.37 + radius * math.cos(angle), 6.52 + radius * math.sin(angle)])
+    geometry = {"type": "Polygon", "coordinates": [ring + [ring[0]]]}
+    geofence = compile_geofence(geometry)
+
+    for _ in range(2000):
+        lat = 6.52 + rng.uniform(-0.008, 0.008)
+        lon = 3.37 + rng.uniform(-0.008, 0.008)
+        assert geofence.contains(lat, lon) == ray_cast({"type": "Polygon", "coordinates": [ring]}, lat, lon)
+
+def test_rejects_too_many_vertices():
+    ring = [[math.cos(i), math.sin(i)] for i in range(GEOFENCE_MAX_VERTICES + 1)]
+    with pytest.raises(ValueError):
+        compile_geofence({"type": "Polygon", "coordinates": [ring]})
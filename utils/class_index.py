@@ -0,0 +1,134 @@
+import asyncio
+import bisect
+import os
+import time
+from typing import List, Optional
+
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models import Class, ClassTombstone
+
+try:
+    CLASS_INDEX_SYNC_SECONDS = float(os.getenv("CLASS_INDEX_SYNC_SECONDS", 5))
+except (TypeError, ValueError):
+    CLASS_INDEX_SYNC_SECONDS = 5.0
+
+try:
+    CLASS_INDEX_FULL_SYNC_EVERY = int(os.getenv("CLASS_INDEX_FULL_SYNC_EVERY", 60))
+except (TypeError, ValueError):
+    CLASS_INDEX_FULL_SYNC_EVERY = 60
+
+
+class ClassCodeIndex:
+    # Binary search over lower-cased codes. Local writes apply immediately;
+    # other workers' creates and deletes arrive through sync(), which the
+    # scheduler runs every CLASS_INDEX_SYNC_SECONDS off the request path.
+    # Deletes are read from class_tombstones, so a class deleted elsewhere
+    # stays suggestible for at most one sync interval.
+
+    def __init__(self):
+        self._keys: List[str] = []
+        self._entries: List[dict] = []
+        self._loaded_at: Optional[float] = None
+        self._last_class_id = 0
+        self._last_tombstone_id = 0
+        self._syncs = 0
+        self._lock = asyncio.Lock()
+
+    def load(self, rows):
+        entries = sorted(
+            ({"id": row.id, "code": row.code, "name": row.name} for row in rows),
+            key=lambda entry: entry["code"].lower()
+        )
+        self._entries = entries
+        self._keys = [entry["code"].lower() for entry in entries]
+        self._last_class_id = max((entry["id"] for entry in entries), default=0)
+        self._loaded_at = time.monotonic()
+
+    async def refresh(self, db: AsyncSession):
+        result = await db.execute(select(func.max(ClassTombstone.id)))
+        last_tombstone_id = result.scalar() or 0
+        result = await db.execute(
+            select(Class.id, Class.code, Class.name).where(Class.deleted_at.is_(None))
+        )
+        # The old lists keep serving until the new ones are swapped in
+        self.load(result.all())
+        self._last_tombstone_id = last_tombstone_id
+
+    async def ensure_loaded(self, db: AsyncSession):
+        if self._loaded_at is not None:
+            return
+        async with self._lock:
+            if self._loaded_at is None:
+                await self.refresh(db)
+
+    async def sync(self, session_maker) -> dict:
+        self._syncs += 1
+        async with session_maker() as session:
+            result = await session.execute(
+                select(ClassTombstone.id, ClassTombstone.class_id, ClassTombstone.code)
+                .where(ClassTombstone.id > self._last_tombstone_id)
+                .order_by(ClassTombstone.id)
+            )
+            tombstones = result.all()
+            
+            if self._loaded_at is None or self._syncs % CLASS_INDEX_FULL_SYNC_EVERY == 0:
+                await self.refresh(session)
+                return {"full": True, "added": 0, "removed": len(tombstones), "size": len(self)}
+            
+            result = await session.execute(
+                select(Class.id, Class.code, Class.name)
+                .where(Class.id > self._last_class_id, Class.deleted_at.is_(None))
+                .order_by(Class.id)
+            )
+            created = result.all()
+        
+        for tombstone_id, class_id, code in tombstones:
+            self.remove(code, class_id)
+            self._last_tombstone_id = tombstone_id
+        for row in created:
+            self.add(row.id, row.code, row.name)
+            self._last_class_id = row.id
+        
+        return {"full": False, "added": len(created), "removed": len(tombstones), "size": len(self)}
+
+    def add(self, class_id: int, code: str, name: str):
+        if self._loaded_at is None:
+            return
+        # Codes are unique only case-sensitively, so CS101 and cs101 share a
+        # key; replace just this class's own entry
+        self.remove(code, class_id)
+        key = code.lower()
+        position = bisect.bisect_left(self._keys, key)
+        self._keys.insert(position, key)
+        self._entries.insert(position, {"id": class_id, "code": code, "name": name})
+
+    def remove(self, code: str, class_id: Optional[int] = None):
+        # With class_id, a newer class that reused the code is left alone
+        key = code.lower()
+        position = bisect.bisect_left(self._keys, key)
+        while position < len(self._keys) and self._keys[position] == key:
+            entry = self._entries[position]
+            if entry["code"] == code and (class_id is None or entry["id"] == class_id):
+                del self._keys[position]
+                del self._entries[position]
+                return
+            position += 1
+
+    def search(self, prefix: str, limit: int = 10) -> List[dict]:
+        key = prefix.lower()
+        position = bisect.bisect_left(self._keys, key)
+        matches = []
+        while position < len(self._keys) and len(matches) < limit:
+            if not self._keys[position].startswith(key):
+                break
+            matches.append(self._entries[position])
+            position += 1
+        return matches
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+
+class_code_index = ClassCodeIndex()
@@ -0,0 +1,118 @@
+import asyncio
+import logging
+import os
+from datetime import datetime, timedelta
+
+from sqlalchemy import select, delete
+
+from database import async_session_maker
+from models import Attendance, AttendanceDailySummary, Class, ClassPurgeJob, PurgeJobStatus
+
+logger = logging.getLogger(__name__)
+
+try:
+    PURGE_CHUNK_SIZE = int(os.getenv("PURGE_CHUNK_SIZE", 500))
+except (TypeError, ValueError):
+    PURGE_CHUNK_SIZE = 500
+
+try:
+    PURGE_RESUME_AFTER_SECONDS = float(os.getenv("PURGE_RESUME_AFTER_SECONDS", 600))
+except (TypeError, ValueError):
+    PURGE_RESUME_AFTER_SECONDS = 600.0
+
+try:
+    PURGE_MAX_ATTEMPTS = int(os.getenv("PURGE_MAX_ATTEMPTS", 5))
+except (TypeError, ValueError):
+    PURGE_MAX_ATTEMPTS = 5
+
+try:
+    PURGE_PAUSE_SECONDS = float(os.getenv("PURGE_PAUSE_SECONDS", 0.05))
+except (TypeError, ValueError):
+    PURGE_PAUSE_SECONDS = 0.05
+
+async def run_purge_job(job_id: int):
+    async with async_session_maker() as session:
+        job = await session.get(ClassPurgeJob, job_id)
+        if job is None or job.status == PurgeJobStatus.COMPLETED:
+            return
+        
+        job.status = PurgeJobStatus.RUNNING
+        job.started_at = job.started_at or datetime.utcnow()
+        job.attempts += 1
+        job.error = None
+        await session.commit()
+        
+        try:
+            # Each chunk is its own short transaction so row locks are never
+            # held for the whole class, and the pause lets other work through.
+            while True:
+                result = await session.execute(
+                    select(Attendance.id)
+                    .where(Attendance.class_id == job.class_id)
+                    .order_by(Attendance.id)
+                    .limit(PURGE_CHUNK_SIZE)
+                )
+                ids = result.scalars().all()
+                if not ids:
+                    break
+                
+                await session.execute(delete(Attendance).where(Attendance.id.in_(ids)))
+                job.processed_rows += len(ids)
+                await session.commit()
+                await asyncio.sleep(PURGE_PAUSE_SECONDS)
+            
+            await session.execute(
+                delete(AttendanceDailySummary).where(AttendanceDailySummary.class_id == job.class_id)
+            )
+            await session.execute(
+                delete(Class).where(Class.id == job.class_id, Class.deleted_at.is_not(None))
+            )
+            job.status = PurgeJobStatus.COMPLETED
+            job.finished_at = datetime.utcnow()
+            await session.commit()
+        except Exception as exc:
+            logger.exception("Purge job %s for class %s failed", job_id, job.class_id)
+            await session.rollback()
+            job.status = PurgeJobStatus.FAILED
+            job.error = str(exc)[:500]
+            job.finished_at = datetime.utcnow()
+            await session.commit()
+
+def retry_due(job: ClassPurgeJob, now: datetime) -> bool:
+    # Failed jobs back off exponentially from PURGE_RESUME_AFTER_SECONDS
+    delay = PURGE_RESUME_AFTER_SECONDS * 2 ** max(job.attempts - 1, 0)
+    return job.finished_at is None or job.finished_at < now - timedelta(seconds=delay)
+
+async def resume_stalled_purges() -> dict:
+    # Jobs left behind by a restart (never started, or started long ago)
+    # and failed jobs that have not used up their attempts
+    now = datetime.utcnow()
+    stalled_before = now - timedelta(seconds=PURGE_RESUME_AFTER_SECONDS)
+    
+    async with async_session_maker() as session:
+        result = await session.execute(
+            select(ClassPurgeJob.id).where(
+                (
+                    (ClassPurgeJob.status == PurgeJobStatus.PENDING)
+                    & (ClassPurgeJob.created_at < stalled_before)
+                )
+                | (
+                    (ClassPurgeJob.status == PurgeJobStatus.RUNNING)
+                    & (ClassPurgeJob.started_at < stalled_before)
+                )
+            )
+        )
+        job_ids = list(result.scalars().all())
+        
+        result = await session.execute(
+            select(ClassPurgeJob).where(
+                ClassPurgeJob.status == PurgeJobStatus.FAILED,
+                ClassPurgeJob.attempts < PURGE_MAX_ATTEMPTS
+            )
+        )
+        retried = [job.id for job in result.scalars().all() if retry_due(job, now)]
+    
+    for job_id in job_ids + retried:
+        await run_purge_job(job_id)
+    
+    return {"resumed": len(job_ids), "retried": len(retried)}
@@ -0,0 +1,14 @@
+import os
+
+from utils.ttl_cache import TTLCache
+
+try:
+    DASHBOARD_CACHE_SECONDS = float(os.getenv("DASHBOARD_CACHE_SECONDS", 15))
+except (TypeError, ValueError):
+    DASHBOARD_CACHE_SECONDS = 15.0
+
+# Keyed by (lecturer_id, recent); writes that affect a lecturer drop their entries
+dashboard_cache = TTLCache(DASHBOARD_CACHE_SECONDS)
+
+def invalidate_lecturer(lecturer_id: int):
+    dashboard_cache.invalidate_where(lambda key: key[0] == lecturer_id)
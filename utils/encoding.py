@@ -0,0 +1,134 @@
+import gzip
+import json
+import os
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from fastapi import Request, Response
+from fastapi.concurrency import run_in_threadpool
+from pydantic import BaseModel, TypeAdapter
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+JSON_MEDIA_TYPE = "application/json"
+COLUMNAR_MEDIA_TYPE = "application/vnd.eattendance.columnar+json"
+MSGPACK_MEDIA_TYPES = ("application/msgpack", "application/x-msgpack", "application/vnd.msgpack")
+VARY_HEADER = "Accept, Accept-Encoding"
+
+try:
+    GZIP_MIN_BYTES = int(os.getenv("GZIP_MIN_BYTES", 1024))
+except (TypeError, ValueError):
+    GZIP_MIN_BYTES = 1024
+
+try:
+    GZIP_THREADPOOL_BYTES = int(os.getenv("GZIP_THREADPOOL_BYTES", 256 * 1024))
+except (TypeError, ValueError):
+    GZIP_THREADPOOL_BYTES = 256 * 1024
+
+try:
+    GZIP_LEVEL = int(os.getenv("GZIP_LEVEL", 6))
+except (TypeError, ValueError):
+    GZIP_LEVEL = 6
+
+_adapters: Dict[type, TypeAdapter] = {}
+
+def parse_accept(header: str) -> List[tuple]:
+    media_types = []
+    for part in header.split(","):
+        pieces = [piece.strip() for piece in part.split(";")]
+        if not pieces[0]:
+            continue
+        params = {}
+        for piece in pieces[1:]:
+            name, _, value = piece.partition("=")
+            params[name.strip().lower()] = value.strip()
+        try:
+            quality = float(params.pop("q", 1))
+        except ValueError:
+            quality = 1.0
+        media_types.append((pieces[0].lower(), params, quality))
+    media_types.sort(key=lambda item: item[2], reverse=True)
+    return media_types
+
+def accepts_gzip(request: Request) -> bool:
+    for coding, params, quality in parse_accept(request.headers.get("accept-encoding", "")):
+        if coding == "gzip" and quality > 0:
+            return True
+    return False
+
+def to_columnar(rows: List[dict], dictionary_fields: Sequence[str]) -> dict:
+    # Repeated values (names, codes) are sent once per table and referenced
+    # by index from each row, instead of being repeated on every record.
+    fields = list(rows[0]) if rows else []
+    columns = {field: [] for field in fields}
+    dictionaries = {field: [] for field in dictionary_fields if field in columns}
+    lookups = {field: {} for field in dictionaries}
+
+    for row in rows:
+        for field in fields:
+            value = row[field]
+            lookup = lookups.get(field)
+            if lookup is not None:
+                index = lookup.get(value)
+                if index is None:
+                    index = lookup[value] = len(dictionaries[field])
+                    dictionaries[field].append(value)
+                value = index
+            columns[field].append(value)
+
+    return {"count": len(rows), "columns": columns, "dictionaries": dictionaries}
+
+def negotiate(request: Request) -> Tuple[str, bool]:
+    for candidate, params, quality in parse_accept(request.headers.get("accept", "")):
+        if quality <= 0:
+            continue
+        if candidate == COLUMNAR_MEDIA_TYPE:
+            return COLUMNAR_MEDIA_TYPE, True
+        if candidate in MSGPACK_MEDIA_TYPES and msgpack is not None:
+            return candidate, params.get("shape") == "columnar"
+        if candidate in (JSON_MEDIA_TYPE, "application/*", "*/*"):
+            break
+    return JSON_MEDIA_TYPE, False
+
+def representation(request: Request) -> str:
+    # Part of the ETag, so a validator for one encoding never matches another
+    media_type, columnar = negotiate(request)
+    shape = "columnar" if columnar else "rows"
+    coding = "gzip" if accepts_gzip(request) else "identity"
+    return f"{media_type};{shape};{coding}"
+
+async def encoded_response(
+    request: Request,
+    records: List[BaseModel],
+    dictionary_fields: Sequence[str] = (),
+    headers: Optional[dict] = None
+) -> Response:
+    media_type, columnar = negotiate(request)
+
+    if media_type == JSON_MEDIA_TYPE:
+        model = type(records[0]) if records else BaseModel
+        adapter = _adapters.get(model)
+        if adapter is None:
+            adapter = _adapters[model] = TypeAdapter(List[model])
+        body = adapter.dump_json(records)
+    else:
+        rows = [record.model_dump(mode="json") for record in records]
+        payload = to_columnar(rows, dictionary_fields) if columnar else rows
+        if media_type == COLUMNAR_MEDIA_TYPE:
+            body = json.dumps(payload, separators=(",", ":")).encode()
+        else:
+            body = msgpack.packb(payload)
+
+    response_headers = dict(headers or {})
+    response_headers["Vary"] = VARY_HEADER
+
+    if len(body) >= GZIP_MIN_BYTES and accepts_gzip(request):
+        if len(body) >= GZIP_THREADPOOL_BYTES:
+            body = await run_in_threadpool(gzip.compress, body, GZIP_LEVEL)
+        else:
+            body = gzip.compress(body, GZIP_LEVEL)
+        response_headers["Content-Encoding"] = "gzip"
+
+    return Response(content=body, media_type=media_type, headers=response_headers)
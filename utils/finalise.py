@@ -0,0 +1,112 @@
+import asyncio
+import os
+from datetime import date, datetime, time, timedelta
+from typing import Iterable
+
+from sqlalchemy import select, update, delete, insert, exists, and_, or_, case, func, literal, Date
+
+from models import Attendance, AttendanceDailySummary, AttendanceStatus, Class
+
+ATTENDANCE_FINALISE_POLICY = os.getenv("ATTENDANCE_FINALISE_POLICY", "geofence").lower()
+
+try:
+    FINALISE_BATCH_SIZE = int(os.getenv("FINALISE_BATCH_SIZE", 1000))
+except (TypeError, ValueError):
+    FINALISE_BATCH_SIZE = 1000
+
+try:
+    FINALISE_INTERVAL_SECONDS = float(os.getenv("FINALISE_INTERVAL_SECONDS", 900))
+except (TypeError, ValueError):
+    FINALISE_INTERVAL_SECONDS = 900.0
+
+def status_literal(value: AttendanceStatus):
+    return literal(value, type_=Attendance.__table__.c.status.type)
+
+def finalised_status():
+    if ATTENDANCE_FINALISE_POLICY == "approve":
+        return status_literal(AttendanceStatus.APPROVED)
+    if ATTENDANCE_FINALISE_POLICY == "deny":
+        return status_literal(AttendanceStatus.DENIED)
+    
+    # Same rule as mark time: inside the polygon (distance 0) or within the radius
+    within_geofence = exists().where(
+        Class.id == Attendance.class_id,
+        or_(
+            and_(Class.geofence.is_(None), Attendance.distance <= Class.radius),
+            and_(Class.geofence.is_not(None), Attendance.distance <= 0)
+        )
+    )
+    return case(
+        (within_geofence, status_literal(AttendanceStatus.APPROVED)),
+        else_=status_literal(AttendanceStatus.DENIED)
+    )
+
+async def refresh_daily_summaries(session, days: Iterable[date]):
+    now = datetime.utcnow()
+    for day in sorted(days):
+        day_start = datetime.combine(day, time.min)
+        day_end = day_start + timedelta(days=1)
+        
+        await session.execute(
+            delete(AttendanceDailySummary).where(AttendanceDailySummary.day == day)
+        )
+        counts = (
+            select(
+                Attendance.class_id,
+                literal(day, type_=Date),
+                func.sum(case((Attendance.status == AttendanceStatus.APPROVED, 1), else_=0)),
+                func.sum(case((Attendance.status == AttendanceStatus.DENIED, 1), else_=0)),
+                func.sum(case((Attendance.status == AttendanceStatus.PENDING, 1), else_=0)),
+                literal(now)
+            )
+            .where(Attendance.marked_at >= day_start, Attendance.marked_at < day_end)
+            .group_by(Attendance.class_id)
+        )
+        await session.execute(
+            insert(AttendanceDailySummary).from_select(
+                ["class_id", "day", "approved", "denied", "pending", "refreshed_at"],
+                counts
+            )
+        )
+        await session.commit()
+
+async def finalise_attendance(session_maker) -> dict:
+    now = datetime.utcnow()
+    cutoff = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    pending_before_cutoff = and_(
+        Attendance.status == AttendanceStatus.PENDING,
+        Attendance.marked_at < cutoff
+    )
+    
+    async with session_maker() as session:
+        result = await session.execute(
+            select(func.date(Attendance.marked_at)).where(pending_before_cutoff).distinct()
+        )
+        days = {date.fromisoformat(str(value)[:10]) for value in result.scalars().all() if value}
+        days.add((cutoff - timedelta(days=1)).date())
+        
+        finalised = 0
+        while True:
+            batch = (
+                select(Attendance.id)
+                .where(pending_before_cutoff)
+                .order_by(Attendance.id)
+                .limit(FINALISE_BATCH_SIZE)
+                .scalar_subquery()
+            )
+            result = await session.execute(
+                update(Attendance)
+                .where(Attendance.id.in_(batch))
+                .values(status=finalised_status(), updated_at=now)
+                .execution_options(synchronize_session=False)
+            )
+            await session.commit()
+            
+            finalised += result.rowcount
+            if result.rowcount < FINALISE_BATCH_SIZE:
+                break
+            await asyncio.sleep(0)
+        
+        await refresh_daily_summaries(session, days)
+    
+    return {"finalised": finalised, "summary_days": len(days), "policy": ATTENDANCE_FINALISE_POLICY}
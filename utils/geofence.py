@@ -1,4 +1,16 @@
+import bisect
+import json
 import math
+import os
+from functools import lru_cache
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+EARTH_RADIUS = 6371000
+
+try:
+    GEOFENCE_MAX_VERTICES = int(os.getenv("GEOFENCE_MAX_VERTICES", 1000))
+except (TypeError, ValueError):
+    GEOFENCE_MAX_VERTICES = 1000
 
 def haversine_distance(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
     R = 6371000
@@ -18,14 +30,186 @@ def haversine_distance(lat1: float, lon1: float, lat2: float, lon2: float) -> fl
     
     return distance
 
+class CompiledGeofence:
+    # Rings are projected once onto a local equirectangular plane (metres)
+    # around the bounding-box centre. Edges are bucketed into horizontal slabs
+    # between consecutive vertex latitudes and sorted by x inside each slab,
+    # so a lookup is two binary searches instead of a scan over every edge.
+    __slots__ = (
+        "min_lat", "max_lat", "min_lon", "max_lon",
+        "origin_lat", "origin_lon", "_x_scale", "_y_scale",
+        "_edges", "_slab_ys", "_slabs"
+    )
+
+    def __init__(self, polygons: Sequence[Sequence[Sequence[Tuple[float, float]]]]):
+        points = [point for polygon in polygons for ring in polygon for point in ring]
+        self.min_lon = min(lon for lon, _ in points)
+        self.max_lon = max(lon for lon, _ in points)
+        self.min_lat = min(lat for _, lat in points)
+        self.max_lat = max(lat for _, lat in points)
+        self.origin_lat = (self.min_lat + self.max_lat) / 2
+        self.origin_lon = (self.min_lon + self.max_lon) / 2
+        self._y_scale = math.radians(1) * EARTH_RADIUS
+        self._x_scale = self._y_scale * math.cos(math.radians(self.origin_lat))
+
+        edges = []
+        for polygon in polygons:
+            for ring in polygon:
+                projected = [self.project(lat, lon) for lon, lat in ring]
+                if projected[0] != projected[-1]:
+                    projected.append(projected[0])
+                for (x1, y1), (x2, y2) in zip(projected, projected[1:]):
+                    if (x1, y1) != (x2, y2):
+                        edges.append((x1, y1, x2, y2))
+        self._edges = edges
+
+        # Sweep upwards: edges join the active list at their lower end and
+        # leave at their upper end, so each slab only looks at the edges
+        # that actually span it instead of every edge in the geofence
+        slab_ys = sorted({y for _, y1, _, y2 in edges for y in (y1, y2)})
+        pending = sorted(edges, key=lambda edge: min(edge[1], edge[3]))
+        next_edge = 0
+        active = []
+        slabs = []
+        for low, high in zip(slab_ys, slab_ys[1:]):
+            while next_edge < len(pending) and min(pending[next_edge][1], pending[next_edge][3]) <= low:
+                active.append(pending[next_edge])
+                next_edge += 1
+            active = [edge for edge in active if max(edge[1], edge[3]) >= high]
+
+            middle = (low + high) / 2
+            crossing = []
+            for x1, y1, x2, y2 in active:
+                slope = (x2 - x1) / (y2 - y1)
+                crossing.append((x1 + (middle - y1) * slope, x1, y1, slope))
+            crossing.sort()
+            slabs.append([(x1, y1, slope) for _, x1, y1, slope in crossing])
+        self._slab_ys = slab_ys
+        self._slabs = slabs
+
+    def project(self, lat: float, lon: float) -> Tuple[float, float]:
+        return (lon - self.origin_lon) * self._x_scale, (lat - self.origin_lat) * self._y_scale
+
+    def contains(self, lat: float, lon: float) -> bool:
+        if not (self.min_lat <= lat <= self.max_lat and self.min_lon <= lon <= self.max_lon):
+            return False
+
+        x, y = self.project(lat, lon)
+        index = bisect.bisect_right(self._slab_ys, y) - 1
+        if index < 0 or index >= len(self._slabs):
+            return False
+
+        slab = self._slabs[index]
+        low, high = 0, len(slab)
+        while low < high:
+            middle = (low + high) // 2
+            x1, y1, slope = slab[middle]
+            if x1 + (y - y1) * slope <= x:
+                low = middle + 1
+            else:
+                high = middle
+
+        # Even-odd rule: holes and multi-polygon parts fall out naturally
+        return (len(slab) - low) % 2 == 1
+
+    def distance_to_boundary(self, lat: float, lon: float) -> float:
+        x, y = self.project(lat, lon)
+        best = math.inf
+        for x1, y1, x2, y2 in self._edges:
+            dx, dy = x2 - x1, y2 - y1
+            t = ((x - x1) * dx + (y - y1) * dy) / (dx * dx + dy * dy)
+            t = max(0.0, min(1.0, t))
+            best = min(best, math.hypot(x - (x1 + t * dx), y - (y1 + t * dy)))
+        return best
+
+    def check(self, lat: float, lon: float) -> Tuple[bool, float]:
+        if self.contains(lat, lon):
+            return True, 0.0
+        return False, self.distance_to_boundary(lat, lon)
+
+def _parse_ring(ring) -> List[Tuple[float, float]]:
+    points = []
+    for point in ring:
+        if len(point) < 2:
+            raise ValueError("Geofence positions must be [longitude, latitude]")
+        lon, lat = float(point[0]), float(point[1])
+        if not (-180 <= lon <= 180 and -90 <= lat <= 90):
+            raise ValueError("Geofence position out of range")
+        points.append((lon, lat))
+    if points and points[0] == points[-1]:
+        points.pop()
+    if len(set(points)) < 3:
+        raise ValueError("Geofence rings need at least three distinct positions")
+    return points
+
+def count_vertices(polygons) -> int:
+    return sum(len(ring) for polygon in polygons for ring in polygon)
+
+def compile_geofence(geometry: dict) -> CompiledGeofence:
+    geometry_type = geometry.get("type")
+    coordinates = geometry.get("coordinates")
+
+    if geometry_type == "Polygon":
+        polygons = [coordinates]
+    elif geometry_type == "MultiPolygon":
+        polygons = coordinates
+    else:
+        raise ValueError("Geofence must be a GeoJSON Polygon or MultiPolygon")
+
+    if not polygons or any(not polygon for polygon in polygons):
+        raise ValueError("Geofence has no rings")
+    if count_vertices(polygons) > GEOFENCE_MAX_VERTICES:
+        raise ValueError(f"Geofence has more than {GEOFENCE_MAX_VERTICES} vertices")
+
+    return CompiledGeofence([[_parse_ring(ring) for ring in polygon] for polygon in polygons])
+
+@lru_cache(maxsize=1024)
+def _compile_geofence_json(geometry_json: str) -> CompiledGeofence:
+    return compile_geofence(json.loads(geometry_json))
+
+def get_compiled_geofence(geometry: Optional[dict]) -> Optional[CompiledGeofence]:
+    if not geometry:
+        return None
+    return _compile_geofence_json(json.dumps(geometry, sort_keys=True, separators=(",", ":")))
+
 def is_within_geofence(
     student_lat: float,
     student_lon: float,
     class_lat: float,
     class_lon: float,
-    radius: float
+    radius: float,
+    polygon: Optional[CompiledGeofence] = None
 ) -> tuple[bool, float]:
+    if polygon is not None:
+        return polygon.check(student_lat, student_lon)
+    
     distance = haversine_distance(student_lat, student_lon, class_lat, class_lon)
     is_within = distance <= radius
     
-    return is_within, distance
\ No newline at end of file
+    return is_within, distance
+
+def is_within_geofence_batch(
+    points: Iterable[Tuple[float, float]],
+    class_lat: float,
+    class_lon: float,
+    radius: float,
+    polygon: Optional[CompiledGeofence] = None
+) -> List[Tuple[bool, float]]:
+    if polygon is not None:
+        return [polygon.check(lat, lon) for lat, lon in points]
+
+    class_lat_rad = math.radians(class_lat)
+    class_lon_rad = math.radians(class_lon)
+    cos_class_lat = math.cos(class_lat_rad)
+
+    results = []
+    for lat, lon in points:
+        lat_rad = math.radians(lat)
+        a = (
+            math.sin((lat_rad - class_lat_rad) / 2)**2
+            + cos_class_lat * math.cos(lat_rad) * math.sin((math.radians(lon) - class_lon_rad) / 2)**2
+        )
+        distance = 2 * EARTH_RADIUS * math.asin(math.sqrt(a))
+        results.append((distance <= radius, distance))
+
+    return results
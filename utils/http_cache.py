@@ -0,0 +1,57 @@
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime
+from typing import Optional
+
+from fastapi import Request, Response, status
+
+
+def make_etag(*parts) -> str:
+    raw = ":".join("" if part is None else str(part) for part in parts)
+    digest = hashlib.blake2b(raw.encode(), digest_size=12).hexdigest()
+    return f'W/"{digest}"'
+
+def format_last_modified(value: Optional[datetime]) -> Optional[str]:
+    if value is None:
+        return None
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return format_datetime(value.astimezone(timezone.utc), usegmt=True)
+
+def etag_matches(request: Request, etag: str) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+
+    # Weak comparison: W/"x" and "x" are treated as equal
+    candidate = etag.removeprefix("W/")
+    for tag in if_none_match.split(","):
+        if tag.strip().removeprefix("W/") == candidate:
+            return True
+    return False
+
+def cache_headers(etag: str, last_modified: Optional[datetime] = None) -> dict:
+    headers = {
+        "ETag": etag,
+        "Cache-Control": "private, no-cache"
+    }
+    formatted = format_last_modified(last_modified)
+    if formatted:
+        headers["Last-Modified"] = formatted
+    return headers
+
+def apply_cache_headers(response: Response, etag: str, last_modified: Optional[datetime] = None):
+    for name, value in cache_headers(etag, last_modified).items():
+        response.headers[name] = value
+
+def not_modified(etag: str, last_modified: Optional[datetime] = None, vary: Optional[str] = None) -> Response:
+    # A 304 must carry the same Vary as the 200 it stands in for
+    headers = cache_headers(etag, last_modified)
+    if vary:
+        headers["Vary"] = vary
+    return Response(
+        status_code=status.HTTP_304_NOT_MODIFIED,
+        headers=headers
+    )
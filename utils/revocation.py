@@ -0,0 +1,133 @@
+import hashlib
+import math
+import os
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from sqlalchemy import select, or_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models import RevokedToken
+
+try:
+    REVOCATION_SYNC_SECONDS = float(os.getenv("REVOCATION_SYNC_SECONDS", 10))
+except (TypeError, ValueError):
+    REVOCATION_SYNC_SECONDS = 10.0
+
+try:
+    REVOCATION_FULL_SYNC_EVERY = int(os.getenv("REVOCATION_FULL_SYNC_EVERY", 60))
+except (TypeError, ValueError):
+    REVOCATION_FULL_SYNC_EVERY = 60
+
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+def to_micros(value: datetime) -> int:
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return (value - EPOCH) // timedelta(microseconds=1)
+
+
+class BloomFilter:
+    def __init__(self, capacity: int = 100000, error_rate: float = 0.001):
+        capacity = max(capacity, 1)
+        self.size = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self.capacity = capacity
+        self.count = 0
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, item: str):
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], "little")
+        second = int.from_bytes(digest[8:], "little") | 1
+        for i in range(self.hash_count):
+            yield (first + i * second) % self.size
+
+    def add(self, item: str):
+        for position in self._positions(item):
+            self._bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, item: str) -> bool:
+        for position in self._positions(item):
+            if not self._bits[position >> 3] & (1 << (position & 7)):
+                return False
+        return True
+
+
+class RevocationList:
+    # The Bloom filter answers the common "not revoked" case without touching
+    # the exact set; a positive is confirmed against the set to rule out false
+    # positives. Everything is in memory and refreshed from revoked_tokens by
+    # a scheduled job, so get_current_user never waits on the database.
+
+    def __init__(self, capacity: int = 100000, error_rate: float = 0.001):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self._refreshes = 0
+        self._reset()
+
+    def _reset(self):
+        self._bloom = BloomFilter(self.capacity, self.error_rate)
+        self._jtis = set()
+        self._user_cutoffs = {}
+        self._last_id = 0
+
+    def add_jti(self, jti: str):
+        if jti in self._jtis:
+            return
+        if self._bloom.count >= self._bloom.capacity:
+            self.capacity *= 2
+            jtis = self._jtis
+            self._bloom = BloomFilter(self.capacity, self.error_rate)
+            for existing in jtis:
+                self._bloom.add(existing)
+        self._jtis.add(jti)
+        self._bloom.add(jti)
+
+    def revoke_user(self, user_id: int, revoked_at: datetime):
+        cutoff = to_micros(revoked_at)
+        if cutoff > self._user_cutoffs.get(user_id, 0):
+            self._user_cutoffs[user_id] = cutoff
+
+    def is_revoked(self, jti: Optional[str], user_id: int, issued_at_us: Optional[int]) -> bool:
+        # Both sides are in microseconds, so a login in the same second as
+        # the revocation is not caught by it
+        cutoff = self._user_cutoffs.get(user_id)
+        if cutoff is not None and (issued_at_us is None or issued_at_us <= cutoff):
+            return True
+        if jti is None or jti not in self._bloom:
+            return False
+        return jti in self._jtis
+
+    def apply(self, row: RevokedToken):
+        if row.jti is None:
+            self.revoke_user(row.user_id, row.revoked_at)
+        else:
+            self.add_jti(row.jti)
+        self._last_id = max(self._last_id, row.id)
+
+    async def sync(self, db: AsyncSession, full: bool = False):
+        query = select(RevokedToken).where(
+            or_(RevokedToken.expires_at.is_(None), RevokedToken.expires_at > datetime.utcnow())
+        )
+        if not full:
+            query = query.where(RevokedToken.id > self._last_id)
+
+        result = await db.execute(query.order_by(RevokedToken.id))
+        rows = result.scalars().all()
+
+        if full:
+            self._reset()
+        for row in rows:
+            self.apply(row)
+
+    async def refresh(self, session_maker) -> dict:
+        self._refreshes += 1
+        full = self._refreshes % REVOCATION_FULL_SYNC_EVERY == 0
+        async with session_maker() as session:
+            await self.sync(session, full=full)
+        return {"full": full, "revoked_tokens": len(self._jtis), "revoked_users": len(self._user_cutoffs)}
+
+
+revocation_list = RevocationList()
@@ -0,0 +1,145 @@
+import asyncio
+import logging
+import os
+import random
+import socket
+import time
+import uuid
+from contextlib import suppress
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from sqlalchemy import update, or_
+from sqlalchemy.exc import IntegrityError
+
+from models import SchedulerLock
+
+logger = logging.getLogger(__name__)
+
+BACKGROUND_JOBS_ENABLED = os.getenv("BACKGROUND_JOBS_ENABLED", "true").lower() in ("1", "true", "yes")
+
+
+class ScheduledJob:
+    def __init__(
+        self,
+        name: str,
+        func: Callable[[], Awaitable[Optional[dict]]],
+        interval_seconds: float,
+        jitter: float = 0.1,
+        exclusive: bool = True,
+        lease_seconds: Optional[float] = None
+    ):
+        self.name = name
+        self.func = func
+        self.interval_seconds = interval_seconds
+        self.jitter = jitter
+        self.exclusive = exclusive
+        self.lease_seconds = lease_seconds or interval_seconds
+        self.metrics = {
+            "name": name,
+            "interval_seconds": interval_seconds,
+            "exclusive": exclusive,
+            "runs": 0,
+            "failures": 0,
+            "skipped": 0,
+            "last_started_at": None,
+            "last_finished_at": None,
+            "last_duration_ms": None,
+            "last_result": None,
+            "last_error": None
+        }
+
+    def next_delay(self) -> float:
+        spread = self.interval_seconds * self.jitter
+        return max(0.0, self.interval_seconds + random.uniform(-spread, spread))
+
+
+class Scheduler:
+    # Exclusive jobs take a row lease in scheduler_locks before running, so
+    # with several workers only one of them runs each job per interval. The
+    # lease is left to expire instead of being released, which also stops the
+    # other workers from running the job again straight afterwards.
+
+    def __init__(self, session_maker, owner: Optional[str] = None):
+        self.session_maker = session_maker
+        self.owner = owner or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.jobs: Dict[str, ScheduledJob] = {}
+        self._tasks: List[asyncio.Task] = []
+
+    def add_job(self, name: str, func, interval_seconds: float, **options) -> ScheduledJob:
+        job = ScheduledJob(name, func, interval_seconds, **options)
+        self.jobs[name] = job
+        return job
+
+    def start(self):
+        for job in self.jobs.values():
+            self._tasks.append(asyncio.create_task(self._run_loop(job), name=f"scheduler:{job.name}"))
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        for task in self._tasks:
+            with suppress(asyncio.CancelledError):
+                await task
+        self._tasks = []
+
+    async def _run_loop(self, job: ScheduledJob):
+        # Spread the first run so workers started together do not collide
+        await asyncio.sleep(random.uniform(0, job.interval_seconds * job.jitter))
+        while True:
+            await self.run_job(job)
+            await asyncio.sleep(job.next_delay())
+
+    async def acquire_lease(self, job: ScheduledJob) -> bool:
+        now = datetime.utcnow()
+        expires_at = now + timedelta(seconds=job.lease_seconds)
+
+        async with self.session_maker() as session:
+            result = await session.execute(
+                update(SchedulerLock)
+                .where(
+                    SchedulerLock.name == job.name,
+                    or_(SchedulerLock.expires_at < now, SchedulerLock.owner == self.owner)
+                )
+                .values(owner=self.owner, expires_at=expires_at)
+            )
+            if result.rowcount:
+                await session.commit()
+                return True
+
+            session.add(SchedulerLock(name=job.name, owner=self.owner, expires_at=expires_at))
+            try:
+                await session.commit()
+                return True
+            except IntegrityError:
+                await session.rollback()
+                return False
+
+    async def run_job(self, job: ScheduledJob):
+        metrics = job.metrics
+        try:
+            if job.exclusive and not await self.acquire_lease(job):
+                metrics["skipped"] += 1
+                return
+        except Exception as exc:
+            logger.exception("Scheduler could not take the lease for %s", job.name)
+            metrics["failures"] += 1
+            metrics["last_error"] = str(exc)[:500]
+            return
+
+        started = time.perf_counter()
+        metrics["last_started_at"] = datetime.utcnow()
+        try:
+            metrics["last_result"] = await job.func()
+            metrics["last_error"] = None
+        except Exception as exc:
+            logger.exception("Scheduled job %s failed", job.name)
+            metrics["failures"] += 1
+            metrics["last_error"] = str(exc)[:500]
+        finally:
+            metrics["runs"] += 1
+            metrics["last_finished_at"] = datetime.utcnow()
+            metrics["last_duration_ms"] = round((time.perf_counter() - started) * 1000, 3)
+
+    def metrics(self) -> List[dict]:
+        return [dict(job.metrics) for job in self.jobs.values()]
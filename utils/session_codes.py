@@ -0,0 +1,73 @@
+import hashlib
+import hmac
+import os
+import time
+from collections import OrderedDict
+from typing import Hashable, Optional, Tuple
+
+SESSION_CODE_SECRET = os.getenv("SESSION_CODE_SECRET") or os.getenv("SECRET_KEY", "your-insecure-default-key-REPLACE-THIS-NOW")
+
+try:
+    SESSION_CODE_STEP_SECONDS = int(os.getenv("SESSION_CODE_STEP_SECONDS", 30))
+except (TypeError, ValueError):
+    SESSION_CODE_STEP_SECONDS = 30
+
+try:
+    SESSION_CODE_DIGITS = int(os.getenv("SESSION_CODE_DIGITS", 6))
+except (TypeError, ValueError):
+    SESSION_CODE_DIGITS = 6
+
+try:
+    SESSION_CODE_WINDOW = int(os.getenv("SESSION_CODE_WINDOW", 1))
+except (TypeError, ValueError):
+    SESSION_CODE_WINDOW = 1
+
+_key = SESSION_CODE_SECRET.encode()
+
+def time_step(at: Optional[float] = None) -> int:
+    return int((time.time() if at is None else at) // SESSION_CODE_STEP_SECONDS)
+
+def generate_code(class_id: int, step: int) -> str:
+    digest = hmac.new(_key, f"{class_id}:{step}".encode(), hashlib.sha256).digest()
+    # RFC 4226 dynamic truncation
+    offset = digest[-1] & 0x0F
+    value = int.from_bytes(digest[offset:offset + 4], "big") & 0x7FFFFFFF
+    return str(value % 10 ** SESSION_CODE_DIGITS).zfill(SESSION_CODE_DIGITS)
+
+def current_code(class_id: int, at: Optional[float] = None) -> Tuple[str, int]:
+    now = time.time() if at is None else at
+    step = time_step(now)
+    expires_in = SESSION_CODE_STEP_SECONDS - int(now % SESSION_CODE_STEP_SECONDS)
+    return generate_code(class_id, step), expires_in
+
+def verify_code(class_id: int, code: str, at: Optional[float] = None) -> Optional[int]:
+    step = time_step(at)
+    # compare_digest only accepts ASCII str, so compare bytes
+    supplied = code.encode()
+    for candidate in range(step, step - SESSION_CODE_WINDOW - 1, -1):
+        if hmac.compare_digest(generate_code(class_id, candidate).encode(), supplied):
+            return candidate
+    return None
+
+
+class ReplayCache:
+    def __init__(self, ttl_seconds: float, maxsize: int = 100000):
+        self.ttl_seconds = ttl_seconds
+        self.maxsize = maxsize
+        self._seen: "OrderedDict[Hashable, float]" = OrderedDict()
+
+    def check_and_add(self, key: Hashable) -> bool:
+        now = time.monotonic()
+        while self._seen:
+            oldest_key, expires_at = next(iter(self._seen.items()))
+            if expires_at > now and len(self._seen) < self.maxsize:
+                break
+            del self._seen[oldest_key]
+
+        if key in self._seen:
+            return False
+        self._seen[key] = now + self.ttl_seconds
+        return True
+
+
+replay_cache = ReplayCache(ttl_seconds=SESSION_CODE_STEP_SECONDS * (SESSION_CODE_WINDOW + 1))
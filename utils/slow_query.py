@@ -0,0 +1,110 @@
+import json
+import logging
+import time
+from collections import deque
+from contextvars import ContextVar
+from datetime import datetime
+from typing import List, Optional
+
+from sqlalchemy import event
+
+logger = logging.getLogger(__name__)
+
+current_route: ContextVar[Optional[str]] = ContextVar("current_route", default=None)
+
+EXPLAIN_PREFIXES = {
+    "sqlite": "EXPLAIN QUERY PLAN ",
+    "postgresql": "EXPLAIN ",
+    "mysql": "EXPLAIN ",
+}
+
+def parameters_shape(parameters, executemany: bool = False):
+    if executemany and isinstance(parameters, (list, tuple)):
+        return {
+            "rows": len(parameters),
+            "row": parameters_shape(parameters[0]) if parameters else None
+        }
+    if isinstance(parameters, dict):
+        return {key: type(value).__name__ for key, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        return [type(value).__name__ for value in parameters]
+    return type(parameters).__name__
+
+
+class SlowQueryLog:
+    def __init__(self, threshold_ms: float = 200, size: int = 500, explain: bool = False):
+        self.threshold_ms = threshold_ms
+        self.explain = explain
+        self._entries = deque(maxlen=size)
+
+    def install(self, engine):
+        sync_engine = getattr(engine, "sync_engine", engine)
+        event.listen(sync_engine, "before_cursor_execute", self._before_cursor_execute)
+        event.listen(sync_engine, "after_cursor_execute", self._after_cursor_execute)
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        if context is not None:
+            context._slow_query_started_at = time.perf_counter()
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        started_at = getattr(context, "_slow_query_started_at", None)
+        if started_at is None:
+            return
+        duration_ms = (time.perf_counter() - started_at) * 1000
+        if duration_ms < self.threshold_ms:
+            return
+
+        entry = {
+            "recorded_at": datetime.utcnow().isoformat(),
+            "duration_ms": round(duration_ms, 3),
+            "statement": statement,
+            "parameters": parameters_shape(parameters, executemany),
+            "route": current_route.get(),
+            "explain": None
+        }
+        if self.explain and not executemany:
+            entry["explain"] = self._explain(conn, statement, parameters)
+
+        self._entries.append(entry)
+        logger.warning("Slow query (%.1f ms) on %s: %s", duration_ms, entry["route"], statement)
+
+    def _explain(self, conn, statement: str, parameters) -> Optional[List[str]]:
+        prefix = EXPLAIN_PREFIXES.get(conn.dialect.name)
+        if prefix is None or not statement.lstrip().upper().startswith(("SELECT", "WITH")):
+            return None
+
+        # A separate DBAPI cursor leaves the original result unread and does
+        # not fire engine events, so the plan lookup is never logged itself.
+        # It shares the request's transaction, which a failed EXPLAIN would
+        # abort on PostgreSQL, hence the savepoint.
+        savepoint = conn.dialect.name == "postgresql"
+        try:
+            cursor = conn.connection.cursor()
+        except Exception as exc:
+            return [f"EXPLAIN failed: {exc}"]
+        try:
+            if savepoint:
+                cursor.execute("SAVEPOINT slow_query_explain")
+            try:
+                cursor.execute(prefix + statement, parameters)
+                plan = [" ".join(str(column) for column in row) for row in cursor.fetchall()]
+            except Exception as exc:
+                if savepoint:
+                    cursor.execute("ROLLBACK TO SAVEPOINT slow_query_explain")
+                return [f"EXPLAIN failed: {exc}"]
+            if savepoint:
+                cursor.execute("RELEASE SAVEPOINT slow_query_explain")
+            return plan
+        except Exception as exc:
+            return [f"EXPLAIN failed: {exc}"]
+        finally:
+            cursor.close()
+
+    def entries(self) -> List[dict]:
+        return list(self._entries)
+
+    def clear(self):
+        self._entries.clear()
+
+    def to_jsonl(self) -> str:
+        return "".join(json.dumps(entry) + "\n" for entry in self._entries)
@@ -0,0 +1,58 @@
+import logging
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+
+class StartupTimer:
+    # Created when main.py first imports this module, so "import" covers
+    # loading the app modules rather than interpreter start-up itself.
+
+    def __init__(self):
+        self.started_at = datetime.utcnow()
+        self._started = time.perf_counter()
+        self._phases = {}
+        self.details = {}
+        self.ready_at: Optional[datetime] = None
+        self.total_ms: Optional[float] = None
+
+    @contextmanager
+    def phase(self, name: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            self._phases[name] = self._phases.get(name, 0.0) + elapsed_ms
+
+    def mark_imported(self):
+        # Phases timed while modules were loading (settings) are not counted twice
+        elapsed_ms = (time.perf_counter() - self._started) * 1000
+        self._phases["import"] = elapsed_ms - sum(self._phases.values())
+
+    def mark_ready(self):
+        self.ready_at = datetime.utcnow()
+        self.total_ms = round((time.perf_counter() - self._started) * 1000, 3)
+        logger.info(
+            "Started in %.1f ms (%s)",
+            self.total_ms,
+            ", ".join(f"{name} {elapsed_ms:.1f} ms" for name, elapsed_ms in self.phases().items())
+        )
+
+    def phases(self) -> dict:
+        return {name: round(elapsed_ms, 3) for name, elapsed_ms in self._phases.items()}
+
+    def report(self) -> dict:
+        return {
+            "started_at": self.started_at,
+            "ready_at": self.ready_at,
+            "total_ms": self.total_ms,
+            "phases": self.phases(),
+            "details": dict(self.details)
+        }
+
+
+startup_timer = StartupTimer()